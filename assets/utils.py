@@ -1,20 +1,119 @@
-import pygame
+from collections import OrderedDict
+import json
 import logging
-import sys
+import os
+
+import pygame
+
+
+# Asset paths are relative to the game folder, not the working directory.
+GAME_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def resolve_path(file_path):
+    """Return file_path with relative paths taken from the game folder."""
+    return os.path.join(GAME_DIR, file_path)
+
 
 class AssetManager:
-    """A class to manage game assets, like images and sounds."""
+    """
+    A class to manage game assets, like images and sounds.
+
+    Images are decoded the first time they are asked for; preload() can
+    decode a manifest's images ahead of time instead.
 
-    def __init__(self):
-        self.cache = {} # Cache to store loaded assets
+    Images are converted to the display's pixel format when a display
+    exists, so blits do not pay for a conversion each time. Cached images
+    are kept in least-recently-used order and evicted once their total size
+    goes over the byte budget.
+    """
+
+    def __init__(self, budget_bytes=16 * 1024 * 1024):
+        """Initialise an empty cache with the given byte budget."""
+        self.cache = OrderedDict() # Cache to store loaded assets
+        self.budget_bytes = budget_bytes
+        self.bytes_used = 0
+        # Statistics on how the cache is used.
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def preload(self, manifest_path: str):
+        """Load every image listed in the manifest file."""
+        try:
+            with open(resolve_path(manifest_path), 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.info(f"Error reading asset manifest '{manifest_path}': {e}")
+            return
+        if not isinstance(manifest, dict) or not isinstance(manifest.get('images'), list):
+            logging.info(f"Asset manifest '{manifest_path}' has no 'images' list")
+            return
+        for file_path in manifest['images']:
+            self.load_image(file_path)
 
     def load_image(self, file_path: str):
         """Load an image from the given file path and cache it."""
         if file_path in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(file_path)
             return self.cache[file_path]
+        self.misses += 1
         try:
-            image = pygame.image.load()
-            self.cache[file_path] = image
-            return image
+            image = self._convert(pygame.image.load(resolve_path(file_path)))
         except pygame.error as e:
-            logging.info(f"Error loading image '{file_path}': {e}")
\ No newline at end of file
+            logging.info(f"Error loading image '{file_path}': {e}")
+            return None
+        self.cache[file_path] = image
+        self.bytes_used += self._size_of(image)
+        self._evict()
+        return image
+
+    def reconvert(self):
+        """Convert every cached image again, after the display has been recreated."""
+        for file_path, image in self.cache.items():
+            self.cache[file_path] = self._convert(image)
+        self.bytes_used = sum(self._size_of(image) for image in self.cache.values())
+        self._evict()
+
+    def stats(self):
+        """Return the cache statistics as a dictionary."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'images': len(self.cache),
+            'bytes_used': self.bytes_used,
+            'budget_bytes': self.budget_bytes,
+        }
+
+    def _convert(self, image):
+        """Convert an image to the display's pixel format, if there is a display."""
+        if pygame.display.get_surface() is None:
+            return image
+        if image.get_flags() & pygame.SRCALPHA:
+            return image.convert_alpha()
+        return image.convert()
+
+    def _size_of(self, image):
+        """Return the number of bytes of pixel data held by an image."""
+        return image.get_pitch() * image.get_height()
+
+    def _evict(self):
+        """Drop the least recently used images until the cache fits its budget."""
+        # Always keep the most recently used image, even if it alone is too big.
+        while self.bytes_used > self.budget_bytes and len(self.cache) > 1:
+            _, image = self.cache.popitem(last=False)
+            self.bytes_used -= self._size_of(image)
+            self.evictions += 1
+
+
+_asset_manager = None
+
+
+def get_asset_manager():
+    """Return the asset manager shared by the whole process."""
+    global _asset_manager
+    if _asset_manager is None:
+        _asset_manager = AssetManager()
+    return _asset_manager
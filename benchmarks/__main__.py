@@ -0,0 +1,49 @@
+import argparse
+import os
+import sys
+
+from benchmarks import harness, scenarios
+
+
+# Kept beside the benchmarks, so it is found from any working directory.
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the game's hot paths, headless.")
+    parser.add_argument("scenario", nargs="*", help="Only run these scenarios.")
+    parser.add_argument("--baseline", default=BASELINE_PATH,
+                        help="Baseline file to compare against or save to.")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Save this run as the new baseline.")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Fail if a scenario is this fraction slower than the baseline.")
+    parser.add_argument("--list", action="store_true", help="List the scenarios and exit.")
+    args = parser.parse_args()
+
+    all_scenarios = scenarios.all_scenarios()
+    if args.list:
+        print("\n".join(all_scenarios))
+        print("fleet sizes:", scenarios.fleet_sizes())
+        return 0
+
+    results = harness.run(all_scenarios, args.scenario)
+    baseline = harness.load_baseline(args.baseline)
+    print(harness.format_table(results, baseline))
+
+    if args.save_baseline:
+        harness.save_baseline(results, args.baseline)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    if not baseline:
+        print(f"No baseline at {args.baseline}; record one with --save-baseline first.", file=sys.stderr)
+        return 2
+
+    regressions = harness.compare(results, baseline, args.threshold)
+    for name, base_ns, ns in regressions:
+        print(f"REGRESSION {name}: {base_ns:,.0f} -> {ns:,.0f} ns/op")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
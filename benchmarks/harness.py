@@ -0,0 +1,125 @@
+import gc
+import json
+import statistics
+import tracemalloc
+from time import perf_counter_ns
+
+
+def time_op(op, min_ops=20, target_ns=200_000_000, repeats=5):
+    """
+    Time an operation.
+
+    The operation is first run enough times to fill about target_ns, then
+    timed in that many-op batches repeats times.
+
+    Returns:
+    float: The median time of one operation, in nanoseconds.
+    """
+    # Warm up, and find how many operations fit in the target time.
+    start = perf_counter_ns()
+    op()
+    single = max(perf_counter_ns() - start, 1)
+    ops = max(min_ops, target_ns // (single * repeats))
+
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            start = perf_counter_ns()
+            for _ in range(ops):
+                op()
+            samples.append((perf_counter_ns() - start) / ops)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return statistics.median(samples)
+
+
+def peak_allocated(op, ops=20):
+    """
+    Measure the memory an operation allocates.
+
+    Returns:
+    float: The peak bytes allocated above the starting point, per operation.
+    """
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        for _ in range(ops):
+            op()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (peak - current) / ops
+
+
+def run(scenarios, names=None):
+    """
+    Run the benchmark scenarios.
+
+    Args:
+    scenarios (dict): Maps a name to a function that returns the operation to time.
+    names (list): Optional subset of scenario names to run.
+
+    Returns:
+    dict: Maps each scenario name to its ns_per_op, ops_per_sec and alloc_bytes_per_op.
+    """
+    results = {}
+    for name, setup in scenarios.items():
+        if names and name not in names:
+            continue
+        op = setup()
+        ns_per_op = time_op(op)
+        results[name] = {
+            "ns_per_op": ns_per_op,
+            "ops_per_sec": 1e9 / ns_per_op,
+            "alloc_bytes_per_op": peak_allocated(op),
+        }
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Find scenarios that got slower than the baseline.
+
+    Returns:
+    list: (name, baseline ns, current ns) for every scenario slower by more than threshold.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        base_ns = baseline[name]["ns_per_op"]
+        if result["ns_per_op"] > base_ns * (1 + threshold):
+            regressions.append((name, base_ns, result["ns_per_op"]))
+    return regressions
+
+
+def load_baseline(file_path):
+    """Load a baseline saved by save_baseline, or an empty one if there is none."""
+    try:
+        with open(file_path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(results, file_path):
+    """Save results to use as the baseline for later runs."""
+    with open(file_path, 'w') as f:
+        json.dump(results, f, indent=4, sort_keys=True)
+
+
+def format_table(results, baseline=None):
+    """Format results as a text table, with the change against the baseline if given."""
+    baseline = baseline or {}
+    lines = [f"{'scenario':<28} {'ns/op':>14} {'ops/sec':>12} {'alloc B/op':>11} {'vs base':>8}"]
+    for name, result in results.items():
+        change = ""
+        if name in baseline:
+            change = f"{result['ns_per_op'] / baseline[name]['ns_per_op'] - 1:+.0%}"
+        lines.append(f"{name:<28} {result['ns_per_op']:>14,.0f} {result['ops_per_sec']:>12,.1f} "
+                     f"{result['alloc_bytes_per_op']:>11,.0f} {change:>8}")
+    return "\n".join(lines)
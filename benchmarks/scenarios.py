@@ -0,0 +1,137 @@
+import random
+
+from core.game_logic import GameLogic
+from core.vec_env import VecGameEnv
+from entities.bullet_manager import BulletManager
+
+
+# Screen sizes giving small, medium and large fleets.
+FLEET_SCREENS = {"small": (400, 800), "medium": (1920, 1080), "large": (3840, 2160)}
+# Resolutions to time _update_screen at.
+RENDER_SCREENS = {"400x800": (400, 800), "1280x720": (1280, 720), "1920x1080": (1920, 1080)}
+
+
+def make_game(width, height, **overrides):
+    """Create a headless, active game at the given resolution."""
+    overrides.update(screen_width=width, screen_height=height)
+    game = GameLogic(headless=True, config_overrides=overrides)
+    game._start_game()
+    return game
+
+
+def fleet_create(size):
+    """Build a whole new fleet."""
+    game = make_game(*FLEET_SCREENS[size])
+    return game.fleet_manager.create_fleet
+
+
+def fleet_update(size):
+    """Move the fleet by one tick."""
+    game = make_game(*FLEET_SCREENS[size])
+    fleet_manager = game.fleet_manager
+
+    def op():
+        fleet_manager.update()
+        if fleet_manager.reached_bottom():
+            fleet_manager.create_fleet()
+    return op
+
+
+def collisions(size, bullets, seed=0):
+    """Check a full magazine of randomly placed bullets against the fleet."""
+    width, height = FLEET_SCREENS[size]
+    game = make_game(width, height, bullets_allowed=bullets, bullet_width=3)
+    game.bullet_manager = BulletManager(game)
+    bullet_manager, fleet_manager = game.bullet_manager, game.fleet_manager
+    full_fleet = len(fleet_manager)
+    rng = random.Random(seed)
+
+    def op():
+        while len(bullet_manager) < bullets:
+            bullet_manager.fire_bullet()
+        for bullet in bullet_manager.bullets:
+            bullet.reset((rng.randrange(width), rng.randrange(height)))
+        bullet_manager.check_collions(fleet_manager, game.stats, game.sb)
+        if len(fleet_manager) < full_fleet // 2:
+            fleet_manager.create_fleet()
+    return op
+
+
+def prep_score():
+    """Change the score and re-render it."""
+    game = make_game(*FLEET_SCREENS["small"])
+
+    def op():
+        game.stats.score += game.settings.alien_points
+        game.sb.prep_score()
+    return op
+
+
+def update_screen(resolution):
+    """Draw and present one frame."""
+    game = make_game(*RENDER_SCREENS[resolution])
+    for _ in range(game.settings.bullets_allowed):
+        game._fire_bullet()
+    return game._update_screen
+
+
+def update_screen_degraded(resolution):
+    """Draw and present one frame at the lowest render quality."""
+    game = make_game(*RENDER_SCREENS[resolution])
+    for _ in range(game.settings.bullets_allowed):
+        game._fire_bullet()
+    game.frame_budget.level = len(game.frame_budget.levels) - 1
+    return game._update_screen
+
+
+def start_new_level():
+    """Move on to the next level."""
+    game = make_game(*FLEET_SCREENS["medium"])
+
+    def op():
+        game._start_new_level()
+        # Keep the speed from growing without bound over many runs.
+        game.settings.initialize_dynamic_settings()
+    return op
+
+
+def vec_env_step(num_envs, seed=0):
+    """Step a batch of games by one tick, with random actions."""
+    env = VecGameEnv(num_envs)
+    env.reset()
+    rng = random.Random(seed)
+
+    def op():
+        env.step([rng.randrange(6) for _ in range(num_envs)])
+    return op
+
+
+def all_scenarios():
+    """
+    Return every benchmark scenario.
+
+    Returns:
+    dict: Maps a scenario name to a function that sets it up and returns the operation to time.
+    """
+    scenarios = {}
+    for size in FLEET_SCREENS:
+        scenarios[f"fleet_create[{size}]"] = lambda size=size: fleet_create(size)
+        scenarios[f"fleet_update[{size}]"] = lambda size=size: fleet_update(size)
+        for bullets in (3, 50):
+            scenarios[f"collisions[{size},{bullets}]"] = (
+                lambda size=size, bullets=bullets: collisions(size, bullets))
+    scenarios["prep_score"] = prep_score
+    for resolution in RENDER_SCREENS:
+        scenarios[f"update_screen[{resolution}]"] = (
+            lambda resolution=resolution: update_screen(resolution))
+        scenarios[f"update_screen_degraded[{resolution}]"] = (
+            lambda resolution=resolution: update_screen_degraded(resolution))
+    scenarios["start_new_level"] = start_new_level
+    for num_envs in (1, 64):
+        scenarios[f"vec_env_step[{num_envs}]"] = lambda num_envs=num_envs: vec_env_step(num_envs)
+    return scenarios
+
+
+def fleet_sizes():
+    """Return the number of aliens in each fleet size, for the report."""
+    return {size: len(make_game(*screen).fleet_manager) for size, screen in FLEET_SCREENS.items()}
@@ -0,0 +1,196 @@
+"""
+Run many headless games across a process pool, for balancing.
+
+Each job is a dict with a seed, a policy name, config overrides and a
+tick limit. Results stream back as games finish and can be grouped into
+a summary table, e.g.:
+
+    python -m core.batch --games 200 --policy hunter --set speedup_scale=1.1,1.2
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import statistics
+
+import pygame
+
+
+def random_policy(game):
+    """Press and release keys at random."""
+    events = []
+    for key in (pygame.K_LEFT, pygame.K_RIGHT):
+        if game.rng.random() < 0.05:
+            events.append(pygame.event.Event(pygame.KEYDOWN, key=key))
+        elif game.rng.random() < 0.05:
+            events.append(pygame.event.Event(pygame.KEYUP, key=key))
+    if game.rng.random() < 0.1:
+        events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE))
+    return events
+
+
+def hunter_policy(game):
+    """Chase the lowest alien and fire while under it."""
+    fleet_manager, ship = game.fleet_manager, game.ship
+    if not len(fleet_manager):
+        return []
+    alive = fleet_manager.alive
+    lowest = fleet_manager.y[alive].argmax()
+    target_x = fleet_manager.x[alive][lowest] + fleet_manager.alien_width / 2
+
+    events = []
+    want_right = target_x > ship.rect.centerx + 5
+    want_left = target_x < ship.rect.centerx - 5
+    if want_right != ship.moving_right:
+        events.append(pygame.event.Event(pygame.KEYDOWN if want_right else pygame.KEYUP,
+                                         key=pygame.K_RIGHT))
+    if want_left != ship.moving_left:
+        events.append(pygame.event.Event(pygame.KEYDOWN if want_left else pygame.KEYUP,
+                                         key=pygame.K_LEFT))
+    if not (want_left or want_right):
+        events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE))
+    return events
+
+
+POLICIES = {"random": random_policy, "hunter": hunter_policy}
+
+
+def run_job(job):
+    """
+    Play one headless game to the end, or to the tick limit.
+
+    Returns:
+    dict: The job's id, seed, policy and config, with the score, level reached and ticks survived.
+    """
+    from core.game_logic import GameLogic
+
+    game = GameLogic(headless=True, config_overrides=job["config"], seed=job["seed"])
+    policy = POLICIES[job["policy"]]
+    game._start_game()
+    while game.game_active and game.tick < job["max_ticks"]:
+        for event in policy(game):
+            game._handle_event(event)
+        game.update_game()
+    return {
+        "id": job["id"],
+        "seed": job["seed"],
+        "policy": job["policy"],
+        "config": job["config"],
+        "score": game.stats.score,
+        "level": game.stats.level,
+        "ticks": game.tick,
+    }
+
+
+def make_jobs(games, policy, grid, max_ticks, seed=0):
+    """
+    Build games jobs for every combination of the config grid.
+
+    Args:
+    grid (dict): Maps a config key to the list of values to try.
+
+    Returns:
+    list: One job dict per game; seeds are consecutive from seed.
+    """
+    keys = sorted(grid)
+    combinations = [dict(zip(keys, values))
+                    for values in itertools.product(*(grid[key] for key in keys))]
+    jobs = []
+    for config in combinations:
+        for _ in range(games):
+            jobs.append({"id": len(jobs), "seed": seed + len(jobs), "policy": policy,
+                         "config": config, "max_ticks": max_ticks})
+    return jobs
+
+
+def run_batch(jobs, processes=None):
+    """
+    Run jobs over a process pool, one game per task.
+
+    Yields:
+    dict: Each game's result, as soon as it finishes.
+    """
+    pool = multiprocessing.Pool(processes, initializer=_init_worker)
+    try:
+        yield from pool.imap_unordered(run_job, jobs, chunksize=1)
+        pool.close()
+    finally:
+        # Stops any unfinished workers if the caller gave up early.
+        pool.terminate()
+        pool.join()
+
+
+def _init_worker():
+    """Keep SDL from trapping SIGTERM in workers, so the pool can stop them."""
+    os.environ["SDL_NO_SIGNAL_HANDLERS"] = "1"
+
+
+def summarize(results):
+    """
+    Aggregate results per config.
+
+    Returns:
+    list: One row per config with the number of games and the mean/max score, mean level and mean ticks.
+    """
+    groups = {}
+    for result in results:
+        key = json.dumps(result["config"], sort_keys=True)
+        groups.setdefault(key, []).append(result)
+    rows = []
+    for key, group in sorted(groups.items()):
+        scores = [result["score"] for result in group]
+        rows.append({
+            "config": key,
+            "games": len(group),
+            "mean_score": statistics.mean(scores),
+            "max_score": max(scores),
+            "mean_level": statistics.mean(result["level"] for result in group),
+            "mean_ticks": statistics.mean(result["ticks"] for result in group),
+        })
+    return rows
+
+
+def format_summary(rows):
+    """Format summary rows as a text table."""
+    lines = [f"{'config':<48} {'games':>6} {'mean score':>14} {'max score':>14} "
+             f"{'mean level':>10} {'mean ticks':>10}"]
+    for row in rows:
+        lines.append(f"{row['config']:<48} {row['games']:>6} {row['mean_score']:>14,.0f} "
+                     f"{row['max_score']:>14,} {row['mean_level']:>10.2f} {row['mean_ticks']:>10,.0f}")
+    return "\n".join(lines)
+
+
+def parse_grid(assignments):
+    """Turn KEY=V1,V2 strings into a dict of JSON-decoded value lists."""
+    grid = {}
+    for assignment in assignments:
+        key, values = assignment.split("=", 1)
+        grid[key] = [json.loads(value) for value in values.split(",")]
+    return grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many headless games in parallel.")
+    parser.add_argument("--games", type=int, default=100, help="Games per config.")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="hunter")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=V1,V2",
+                        help="Config values to try; may be repeated.")
+    parser.add_argument("--max-ticks", type=int, default=36000, help="Tick limit per game.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first game.")
+    parser.add_argument("--processes", type=int, help="Worker processes; defaults to one per core.")
+    parser.add_argument("--quiet", action="store_true", help="Only print the summary.")
+    args = parser.parse_args()
+
+    jobs = make_jobs(args.games, args.policy, parse_grid(args.set), args.max_ticks, args.seed)
+    results = []
+    for result in run_batch(jobs, args.processes):
+        results.append(result)
+        if not args.quiet:
+            print(f"[{len(results)}/{len(jobs)}] game {result['id']}: score {result['score']}, "
+                  f"level {result['level']}, {result['ticks']} ticks")
+    print(format_summary(summarize(results)))
+
+
+if __name__ == '__main__':
+    main()
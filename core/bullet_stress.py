@@ -0,0 +1,43 @@
+import random
+from time import perf_counter
+
+import pygame
+
+from core.game_logic import GameLogic
+from entities.bullet_manager import BulletManager
+
+
+def run_bullet_stress(n_bullets, n_frames=600, seed=0):
+    """
+    Render a bullet-heavy scene and report how fast frames are produced.
+
+    The pool is resized to hold n_bullets, every bullet is fired from a
+    random point, and bullets leaving the top of the screen re-enter at
+    the bottom, so the screen always holds n_bullets projectiles.
+
+    Returns:
+    float: The number of frames rendered per second.
+    """
+    game = GameLogic(headless=True)
+    game.settings.bullets_allowed = n_bullets
+    game.bullet_manager = BulletManager(game)
+    bullet_manager = game.bullet_manager
+    width, height = game.settings.screen_width, game.settings.screen_height
+
+    rng = random.Random(seed)
+    for _ in range(n_bullets):
+        bullet_manager.fire_bullet()
+    for bullet in bullet_manager.bullets:
+        bullet.reset((rng.randrange(width), rng.randrange(height)))
+
+    start = perf_counter()
+    for _ in range(n_frames):
+        for bullet in bullet_manager.bullets:
+            bullet.update(game.settings.bullet_speed)
+            if bullet.rect.bottom <= 0:
+                bullet.reset((bullet.rect.centerx, height))
+        game.screen.fill(game.bg_color)
+        bullet_manager.draw(game.screen)
+        pygame.display.flip()
+    elapsed = perf_counter() - start
+    return n_frames / elapsed if elapsed > 0 else float("inf")
@@ -0,0 +1,189 @@
+from time import perf_counter
+
+
+class FrameBudget:
+    """
+    A class to keep frames within the time the frame rate allows.
+
+    The time spent on each frame, not counting the wait for the next one,
+    is averaged over a window of frames. When the average runs over the
+    budget, quality drops a level: first the internal render resolution,
+    one render scale at a time, then the scoreboard is redrawn only every
+    other frame, then the number of projectiles drawn is capped. Once
+    frames have had headroom for recover_frames, quality goes back up a
+    level. A step up that overruns straight away doubles the wait before
+    the next try, so quality does not keep flipping between two levels.
+
+    Whether a level helps depends on the machine and the display: a lower
+    render scale still has to be stretched back up, which can cost more
+    than it saves. A level whose frames are no faster than those of the
+    level above it is stepped back out of and passed over until reset().
+    """
+
+    def __init__(self, frame_rate, render_scales=(1.0,), projectile_cap=None, enabled=True,
+                 window=15, headroom=0.7, recover_frames=120, max_recover_frames=1920):
+        """
+        Initialise the controller at full quality.
+
+        Args:
+        frame_rate (int): Frames per second to fit each frame into.
+        render_scales (list): Internal resolutions to step down through, as
+            fractions of the display's, starting with the full one.
+        projectile_cap (int): Most projectiles drawn at the lowest level;
+            None leaves the projectiles out of the levels.
+        enabled (bool): Adjust the quality; if False it stays at full.
+        window (int): Frames averaged before each decision.
+        headroom (float): Fraction of the budget frames must stay under
+            before quality goes back up.
+        recover_frames (int): Frames with headroom before going back up.
+        max_recover_frames (int): Longest the wait grows to after backing off.
+        """
+        self.budget = 1 / frame_rate
+        self.enabled = enabled
+        self.window = window
+        self.headroom = headroom
+        self.recover_frames = recover_frames
+        self.max_recover_frames = max_recover_frames
+
+        # Levels as (render scale, skip HUD on alternate frames, projectile cap).
+        self.levels = [(scale, False, None) for scale in render_scales]
+        lowest_scale = render_scales[-1]
+        self.levels.append((lowest_scale, True, None))
+        if projectile_cap is not None:
+            self.levels.append((lowest_scale, True, projectile_cap))
+        self.level = 0
+
+        self.frames = 0
+        self.started_at = None
+        # Mean frame time last measured at each level, and levels found no faster than the one above.
+        self.level_means = {}
+        self.unhelpful = set()
+        # The level stepped down from, until the new one has been measured.
+        self.stepped_down_from = None
+        # Changing level makes the next frame slow (new surfaces, rescaled images), so it is not counted.
+        self.skip_frame = False
+        self.window_seconds = 0.0
+        self.window_frames = 0
+        self.headroom_frames = 0
+        self.wait_frames = recover_frames
+        # Frame of the last step up, to tell if it overran straight away.
+        self.stepped_up_at = None
+        # Counters.
+        self.frames_at_level = [0] * len(self.levels)
+        self.steps_down = 0
+        self.steps_up = 0
+
+    @property
+    def render_scale(self):
+        """Fraction of the full resolution to render at."""
+        return self.levels[self.level][0]
+
+    @property
+    def skip_hud(self):
+        """True if this frame should leave the scoreboard as it was last drawn."""
+        return self.levels[self.level][1] and self.frames % 2 == 1
+
+    @property
+    def projectile_cap(self):
+        """Most projectiles to draw, or None to draw them all."""
+        return self.levels[self.level][2]
+
+    def begin(self):
+        """Start timing a frame."""
+        self.started_at = perf_counter()
+
+    def end(self):
+        """Finish timing the frame started with begin()."""
+        if self.started_at is not None:
+            self.record(perf_counter() - self.started_at)
+            self.started_at = None
+
+    def record(self, seconds):
+        """Count a frame that took the given number of seconds, changing quality if due."""
+        self.frames_at_level[self.level] += 1
+        self.frames += 1
+        if not self.enabled:
+            return
+        if self.skip_frame:
+            self.skip_frame = False
+            return
+        self.window_seconds += seconds
+        self.window_frames += 1
+        if self.window_frames < self.window:
+            return
+        mean = self.window_seconds / self.window_frames
+        self.window_seconds = 0.0
+        self.window_frames = 0
+        self.level_means[self.level] = mean
+
+        if self.stepped_down_from is not None:
+            above, self.stepped_down_from = self.stepped_down_from, None
+            if mean >= self.level_means[above]:
+                # No faster than the level above, so go back to it and pass this one over.
+                self.unhelpful.add(self.level)
+                self._set_level(above)
+                return
+
+        if mean > self.budget:
+            self.headroom_frames = 0
+            lower = self._next_level(range(self.level + 1, len(self.levels)))
+            if lower is not None:
+                if self.stepped_up_at is not None and self.frames - self.stepped_up_at <= 2 * self.window:
+                    # The level above was too much after all; try it less often.
+                    self.wait_frames = min(self.wait_frames * 2, self.max_recover_frames)
+                self.stepped_up_at = None
+                self.stepped_down_from = self.level
+                self._set_level(lower)
+                self.steps_down += 1
+        elif mean < self.budget * self.headroom:
+            self.headroom_frames += self.window
+            if self.stepped_up_at is not None and self.frames - self.stepped_up_at > 2 * self.window:
+                # The last step up held, so go back to the usual wait.
+                self.wait_frames = self.recover_frames
+                self.stepped_up_at = None
+            higher = self._next_level(range(self.level - 1, -1, -1))
+            if higher is not None and self.headroom_frames >= self.wait_frames:
+                self._set_level(higher)
+                self.steps_up += 1
+                self.stepped_up_at = self.frames
+                self.headroom_frames = 0
+        else:
+            self.headroom_frames = 0
+
+    def _next_level(self, levels):
+        """Return the first of levels not passed over, or None."""
+        for level in levels:
+            if level not in self.unhelpful:
+                return level
+        return None
+
+    def _set_level(self, level):
+        """Change to a quality level, leaving out the frame the change slows down."""
+        self.level = level
+        self.skip_frame = True
+
+    def reset(self):
+        """Go back to full quality and forget what has been measured, as when the display changes."""
+        self._set_level(0)
+        self.window_seconds = 0.0
+        self.window_frames = 0
+        self.headroom_frames = 0
+        self.wait_frames = self.recover_frames
+        self.stepped_up_at = None
+        self.stepped_down_from = None
+        self.level_means.clear()
+        self.unhelpful.clear()
+
+    def format_summary(self):
+        """Return the share of frames drawn at each quality level as readable text."""
+        total = max(self.frames, 1)
+        lines = [f"Frame budget {self.budget * 1000:.1f} ms: "
+                 f"{self.steps_down} steps down, {self.steps_up} steps up"]
+        for (scale, skip_hud, cap), frames in zip(self.levels, self.frames_at_level):
+            details = [f"scale {scale:g}"]
+            if skip_hud:
+                details.append("HUD every other frame")
+            if cap is not None:
+                details.append(f"at most {cap} projectiles")
+            lines.append(f"  {', '.join(details)}: {frames / total:.1%} of frames")
+        return "\n".join(lines)
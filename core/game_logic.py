@@ -1,63 +1,210 @@
+import os
+import random
 import sys
-from time import sleep
+from time import perf_counter
 
 import pygame
 
 from core.settings import Settings
 from core.game_stats import GameStats
+from core.scheduler import TimerQueue
+from core.profiler import FrameProfiler
+from core.memory import MemoryProfiler, GCPolicy
+from core.frame_budget import FrameBudget
+from core.replay import InputLog
+from core.snapshot import RewindBuffer, save_state, save_state_file, load_state_file
+from core.score_store import ScoreStore
 
 from ui.scoreboard import Scoreboard
 from ui.button import Button
+from ui.dirty_renderer import DirtyRenderer
+from ui.text_cache import TextCache
+from ui.profiler_overlay import ProfilerOverlay
+from ui.scaled_view import ScaledView
 
 from entities.ship import Ship
-from entities.bullet import Bullet
-from entities.alien import Alien
 from entities.fleet_manager import FleetManager
 from entities.bullet_manager import BulletManager
 
-from assets.utils import AssetManager
+from assets.utils import get_asset_manager, resolve_path
+
+
+def init_pygame():
+    """
+    Initialise only the pygame modules the game uses.
+
+    pygame.init() would also start audio, joysticks and the like, which
+    the game never touches but which slow down every launch.
+    """
+    pygame.display.init()
+    pygame.font.init()
 
 
 class GameLogic:
     """Overall class to manage game assets and behavior."""
 
-    def __init__(self):
-        """Initialize the game, and create game resources."""
-        pygame.init()
+    def __init__(self, headless=False, config_overrides=None, seed=None, screen=None):
+        """Initialize the game, and create game resources.
+
+        Args:
+        headless (bool): Run without a window, using SDL's dummy video driver.
+        config_overrides (dict): Optional config values that replace those in config.json.
+        seed (int): Seed for the game's random numbers; picked at random if not given.
+        screen (pygame.Surface): Draw to this surface instead of opening a display.
+        """
+        self.headless = headless
+        if self.headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+        init_pygame()
         self.clock = pygame.time.Clock()
-        self.settings = Settings()
+        self.settings = Settings(config_overrides)
+        # All game randomness comes from this generator, so sessions can be replayed.
+        self.seed = seed if seed is not None else random.randrange(2 ** 63)
+        self.rng = random.Random(self.seed)
+        # Set by start_recording() to log every input.
+        self.input_log = None
+        self.input_log_path = None
         self.bg_color = (self.settings.bg_color) 
-        self.screen = pygame.display.set_mode(
-            (self.settings.screen_width, self.settings.screen_height)
-        )
+        if screen is None:
+            self.screen = pygame.display.set_mode(
+                (self.settings.screen_width, self.settings.screen_height)
+            )
+            pygame.display.set_caption("Alien Invasion")
+        else:
+            self.screen = screen
         self.settings.screen_width = self.screen.get_rect().width
         self.settings.screen_height = self.screen.get_rect().height
-        pygame.display.set_caption("Alien Invasion")
+
+        # Rendered text shared by the scoreboard and buttons.
+        self.text_cache = TextCache()
 
         # Start alien invasion in an inactive state. 
         self.game_active = False
         self.play_button = Button(self, "Play")
+        # Number of simulation ticks run so far, and timers keyed by tick.
+        self.tick = 0
+        self.timers = TimerQueue()
+        # Set while the game holds still after the ship was hit.
+        self.ship_hit_paused = False
+        # Set while a SimulationThread runs the game, and whether the game wants the cursor shown.
+        self.simulation_thread = None
+        self.mouse_visible = True
 
         # Create and Instance to store game statistics 
         # and create a scoreboard.
+        # Share one asset manager; images are decoded when first used.
+        self.asset_manager = get_asset_manager()
+        self.asset_manager.budget_bytes = self.settings.asset_cache_bytes
         self.stats = GameStats(self)
+        # Sessions are saved to the score store, if it is on; headless games are not played by anyone.
+        self.player_name = self.settings.player_name
+        self.session_start_tick = 0
+        self.score_store = None
+        if self.settings.score_store_path and not self.headless:
+            self.score_store = ScoreStore(resolve_path(self.settings.score_store_path))
+            # Compacting rewrites the whole file, so only do it once well over the limit.
+            if self.score_store.sessions_at_open > self.settings.score_store_keep_sessions * 1.25:
+                self.score_store.compact(self.settings.score_store_keep_sessions)
+            self.stats.high_score = self.score_store.best_score
         self.sb = Scoreboard(self)
-        self.asset_manager = AssetManager()
-        self.fleet_manager = FleetManager(self)
-        self.bullet_manager - BulletManager(self)
 
         self.ship = Ship(self, self.asset_manager)
+        self.fleet_manager = FleetManager(self)
+        self.bullet_manager = BulletManager(self)
         
         self._create_fleet()
 
+        # Per-phase frame timings, off until toggled with F3.
+        self.profiler = FrameProfiler()
+        # Allocation and GC pause tracking, off until started.
+        self.memory_profiler = MemoryProfiler()
+        # When the garbage collector may run.
+        self.gc_policy = GCPolicy(self.settings.gc_policy)
+        # Render quality, lowered when frames run over budget; timed by the main loop.
+        self.frame_budget = FrameBudget(self.settings.frame_rate, self.settings.render_scales,
+                                        self.settings.projectile_cap,
+                                        enabled=self.settings.adaptive_quality)
+        # Set when the game is drawn through a ScaledView rather than straight to the screen.
+        self.view = None
+        self.view_key = None
+        # The surface the scoreboard was last drawn on, if it is still there.
+        self.hud_drawn_on = None
+        self.profiler_overlay = ProfilerOverlay(self)
+
+        # The last few seconds of game states, if rewinding is on.
+        self.rewind_buffer = None
+        if self.settings.rewind_seconds > 0:
+            self.rewind_buffer = RewindBuffer(self, self.settings.rewind_seconds)
+        # Save the game every so many ticks, if autosave is on.
+        self.autosave_ticks = 0
+        if self.settings.autosave_path:
+            self.autosave_ticks = max(1, round(self.settings.autosave_seconds
+                                               * self.settings.tick_rate))
+
+        # Optionally present only the parts of the screen that changed.
+        self.renderer = DirtyRenderer(self) if self.settings.dirty_rendering else None
+
+    def update_game(self):
+        """Advance the simulation by a single tick."""
+        self.timers.run_due(self.tick)
+        # Remember where things were, to draw between this tick and the next.
+        self.ship.prev_x = self.ship.x
+        self.fleet_manager.save_previous()
+        if not self.ship_hit_paused:
+            self.profiler.begin("ship.update")
+            self.ship.update()
+            self.profiler.end("ship.update")
+            self._update_bullets()
+            self.profiler.begin("update_aliens")
+            self._update_aliens()
+            self.profiler.end("update_aliens")
+        self.tick += 1
+        if self.rewind_buffer is not None:
+            self.rewind_buffer.record()
+        if self.autosave_ticks and self.tick % self.autosave_ticks == 0:
+            save_state_file(self, self.settings.autosave_path)
+
+    def step(self, n_ticks, inputs=None):
+        """
+        Advance the simulation by n_ticks as fast as possible, without rendering.
+
+        Args:
+        n_ticks (int): Number of simulation ticks to run.
+        inputs: Optional sequence of event lists; inputs[i] is handled before tick i.
+
+        Returns:
+        float: The number of ticks simulated per second.
+        """
+        inputs = inputs or ()
+        start = perf_counter()
+        for i in range(n_ticks):
+            if i < len(inputs) and inputs[i]:
+                for event in inputs[i]:
+                    self._handle_event(event)
+            if self.game_active:
+                self.update_game()
+                self.memory_profiler.end_frame()
+        elapsed = perf_counter() - start
+        self.ticks_per_second = n_ticks / elapsed if elapsed > 0 else float("inf")
+        return self.ticks_per_second
+
+    def _create_fleet(self):
+        """Delegate the creation of the fleet to the FleetManager."""
+        self.fleet_manager.create_fleet()
+
     def _fire_bullet(self):
         """Delegate the firing of a bullet to the BulletManager."""
-        self.bullet_manager.fire_bullet()
+        if not self.ship_hit_paused:
+            self.bullet_manager.fire_bullet()
 
     def _update_bullets(self):
         """Delegate the updating of bullets to the BulletManager."""
+        self.profiler.begin("bullets.move")
         self.bullet_manager.update()
-        self.bullet_manager.check_collions(self.fleet_manager.aliens, self.stats, self.sb)
+        self.profiler.end("bullets.move")
+        self.profiler.begin("bullets.check_collions")
+        self.bullet_manager.check_collions(self.fleet_manager, self.stats, self.sb)
+        self.profiler.end("bullets.check_collions")
 
     def _update_aliens(self):
         """Check if the fleet is at an edge, then update positions"""
@@ -67,45 +214,141 @@ class GameLogic:
 
     def _reset_entities(self):
         """Remove all bullets and aliens from the screen, and then create a new fleet and center the ship."""
-        self.bullets.empty()
-        self.fleet_manager.aliens.empty()
-        self.fleet_manager.create_fleet()
+        self.bullet_manager.empty()
+        self.fleet_manager.empty()
+        self._create_fleet()
         self.ship.center_ship()
         
 
-    def _update_screen(self):
+    def _update_screen(self, alpha=1.0, state=None):
+        """
+        Draw the game and present it.
+
+        Args:
+        alpha (float): How far to draw entities between the previous tick (0) and the latest (1).
+        state (RenderState): Draw this copy of the game instead of the game
+            itself, as when a SimulationThread is running it.
+        """
+        self.profiler_overlay.update()
+        if self.renderer and state is None and self._draw_target() is self.screen:
+            # Dirty rects track the latest tick, so this mode does not interpolate.
+            self.profiler.begin("render.dirty")
+            self.renderer.render()
+            self.profiler.end("render.dirty")
+            return
+
+        self._draw_screen(alpha, state)
+            
+        # Make the most recent drawn screen visible. 
+        self.profiler.begin("render.flip")
+        if self.view:
+            self.view.present()
+        pygame.display.flip()
+        self.profiler.end("render.flip")
+
+    def _draw_screen(self, alpha=1.0, state=None):
+        """Draw the whole game, or a RenderState of it, to the screen surface, without presenting it."""
+        screen = self._draw_target()
+        hud = self.sb.images() if state is None else state.hud
+        # Leave the scoreboard's band of the screen as it was last frame, if it is still there.
+        skip_hud = self.frame_budget.skip_hud and self.hud_drawn_on is screen
+        if skip_hud:
+            hud_bottom = max(rect.bottom for _, rect in hud)
+            screen.set_clip((0, hud_bottom, self.settings.screen_width,
+                             self.settings.screen_height - hud_bottom))
          # Redraw the screen during each pass through the loop.
-        self.screen.fill(self.bg_color)
-        for bullet in self.bullets.sprites():
-            bullet.draw_bullet()
-
-        self.ship.blitme()
-        self.aliens.draw(self.screen)
+        self.profiler.begin("render.fill")
+        screen.fill(self.bg_color)
+        self.profiler.end("render.fill")
+
+        self.profiler.begin("render.sprites")
+        if state is None:
+            self.bullet_manager.draw(screen, alpha, self.frame_budget.projectile_cap)
+            self.ship.blitme(alpha)
+            self.fleet_manager.draw(screen, alpha)
+        else:
+            state.draw_sprites(self, screen, alpha, self.frame_budget.projectile_cap)
+        self.profiler.end("render.sprites")
 
         # Draw the score information.
-        self.sb.show_score()
+        if skip_hud:
+            screen.set_clip(None)
+        else:
+            self.profiler.begin("render.show_score")
+            if state is None:
+                self.sb.show_score()
+            else:
+                screen.blits(state.hud, doreturn=False)
+            self.hud_drawn_on = screen
+            self.profiler.end("render.show_score")
 
         # Draw the play burron iof the game is inactive.
-        if not self.game_active:
+        if not (self.game_active if state is None else state.game_active):
             self.play_button.draw_button() 
-            
-        # Make the most recent drawn screen visible. 
-        pygame.display.flip()
+        self.profiler_overlay.draw()
+
+    def _draw_target(self):
+        """
+        Return what to draw the game on at the current screen size and render scale.
+
+        That is the screen itself when it is the size the game is laid out
+        in and the render scale is full. Otherwise it is a ScaledView
+        rendering at that scale and fitted to the middle of the screen, as
+        when the screen is full screen or frames are running over budget.
+        """
+        display_size = self.screen.get_size()
+        key = (display_size, self.frame_budget.render_scale)
+        if key == self.view_key:
+            return self.view or self.screen
+        self.view_key = key
+        self.hud_drawn_on = None
+        logical_size = (self.settings.screen_width, self.settings.screen_height)
+        fit = min(display_size[0] / logical_size[0], display_size[1] / logical_size[1])
+        scale = fit * self.frame_budget.render_scale
+        if display_size == logical_size and scale == 1:
+            self.view = None
+        else:
+            area = pygame.Rect(0, 0, round(logical_size[0] * fit), round(logical_size[1] * fit))
+            area.center = self.screen.get_rect().center
+            # Clear the borders around the view once; it covers the rest every frame.
+            self.screen.fill(self.bg_color)
+            self.view = ScaledView(logical_size, scale, self.screen, area)
+        target = self.view or self.screen
+        for drawer in (self.ship, self.sb, self.play_button, self.profiler_overlay):
+            drawer.screen = target
+        if self.renderer:
+            self.renderer.invalidate()
+        return target
 
     # Event handling
     def _check_events(self):
         """Respond to keypresses, releases and mouse events, and hands them off to the appropriate methods."""
         for event in pygame.event.get():
-            if event.type == pygame.KEYDOWN:
-                self._handle_keydown(event)
-            elif event.type == pygame.KEYUP:
-                self._handle_keyup(event)
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                self._handle_mousebuttondown(event)    
+            self._handle_event(self._logical_event(event))
+
+    def _logical_event(self, event):
+        """Return event with any click moved from the screen into the coordinates the game is laid out in."""
+        if event.type == pygame.MOUSEBUTTONDOWN and self.view:
+            return pygame.event.Event(event.type, button=event.button,
+                                      pos=self.view.to_logical(event.pos))
+        return event
+
+    def _handle_event(self, event):
+        """Hand a single event off to the appropriate method."""
+        if event.type == pygame.QUIT:
+            self._quit()
+        elif event.type == pygame.KEYDOWN:
+            self._handle_keydown(event)
+        elif event.type == pygame.KEYUP:
+            self._handle_keyup(event)
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            self._handle_mousebuttondown(event)    
 
     # Respond to key presses
     def _handle_keydown(self, event):
         """Respond to key presses."""
+        if self.input_log:
+            self.input_log.record(self.tick, InputLog.KEYDOWN, event)
         if event.key == pygame.K_RIGHT:
             self.ship.moving_right = True
         elif event.key == pygame.K_LEFT:
@@ -113,42 +356,129 @@ class GameLogic:
         elif event.key == pygame.K_SPACE:
             self._fire_bullet()
         elif event.key == pygame.K_q:
-            sys.exit()
+            self._quit()
         elif event.key == pygame.K_p:
             self.game_active = not self.game_active
+            if self.game_active:
+                self.gc_policy.play_started()
+            else:
+                self.gc_policy.play_stopped()
         elif event.key == pygame.K_f:
             self._toggle_fullscreen()
+        elif event.key == pygame.K_F3:
+            self._toggle_profiler()
+        elif event.key == pygame.K_BACKSPACE:
+            self._rewind()
             
 
+    def _rewind(self):
+        """Go back a second in time, if rewinding is on."""
+        if self.rewind_buffer is not None and self.game_active:
+            self.rewind_buffer.rewind(1.0)
+
+    def resume(self, file_path):
+        """Carry on from a game saved to file_path."""
+        load_state_file(self, file_path)
+        self.session_start_tick = self.tick
+        if self.score_store is not None and self.score_store.best_score > self.stats.high_score:
+            self.stats.high_score = self.score_store.best_score
+            self.sb.prep_high_score()
+        self._set_mouse_visible(not self.game_active)
+
+    def start_recording(self, file_path):
+        """Record every input from now on, to be saved to file_path on quitting."""
+        # A game already under way, as when resumed, is replayed from its state now.
+        snapshot = save_state(self) if self.tick else b""
+        self.input_log = InputLog(self.seed, self.settings.config, snapshot)
+        self.input_log_path = file_path
+
+    def _quit(self):
+        """Save any frame timings, recorded inputs and the session in play, and exit."""
+        if self.score_store is not None:
+            if self.game_active:
+                self._end_session(self.settings.ship_limit - self.stats.ships_left)
+            self.score_store.close()
+        if self.profiler.enabled:
+            self.profiler.export_chrome_trace(self.settings.profile_trace_path)
+        if self.frame_budget.steps_down:
+            print(self.frame_budget.format_summary())
+        if self.input_log:
+            self.input_log.finish(self)
+            self.input_log.save(self.input_log_path)
+        if self.memory_profiler.enabled:
+            print(self.memory_profiler.format_summary())
+        sys.exit()
+
+    def _toggle_profiler(self):
+        """Turn the frame profiler and its overlay on or off, saving the timings when turned off."""
+        if self.profiler.enabled:
+            self.profiler.export_chrome_trace(self.settings.profile_trace_path)
+            self.profiler.enabled = False
+        else:
+            self.profiler.clear()
+            self.profiler.enabled = True
+        self.profiler_overlay.visible = self.profiler.enabled
+        self.profiler_overlay.prep_timings()
+
     def _toggle_fullscreen(self):
         if self.screen.get_flags() & pygame.FULLSCREEN:
             self.screen = pygame.display.set_mode((self.settings.screen_width, self.settings.screen_height))
         else:
             self.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        # The old view drew onto the display being replaced, and the quality
+        # levels worth using may differ on the new one.
+        self.view_key = None
+        self.frame_budget.reset()
+        # The scoreboard is prepared on the simulation thread while one runs, so rebuild it there.
+        if self.simulation_thread is not None:
+            self.simulation_thread.call(self._refresh_images)
+        else:
+            self._refresh_images()
+        if self.renderer:
+            self.renderer.invalidate()
+
+    def _refresh_images(self):
+        """Convert images to the format of a recreated display and hand them out again."""
+        self.asset_manager.reconvert()
+        self.ship.image = self.asset_manager.load_image('assets/images/ship.bmp')
+        self.fleet_manager.image = self.asset_manager.load_image('assets/images/alien.bmp')
+        self.sb.ship_icon = self.ship.image
+        self.sb.life_strips.clear()
+        self.sb.prep_ships()
 
     # Respond to key releases
     def _handle_keyup(self, event):
         """Respond to key releases."""
+        if self.input_log:
+            self.input_log.record(self.tick, InputLog.KEYUP, event)
         if event.key == pygame.K_RIGHT:
             self.ship.moving_right = False
         elif event.key == pygame.K_LEFT:
             self.ship.moving_left = False
 
     def _handle_mousebuttondown(self, event):
-        mouse_pos = pygame.mouse.get_pos()
-        self._check_play_button(mouse_pos)
+        """Respond to mouse clicks."""
+        if self.input_log:
+            self.input_log.record(self.tick, InputLog.MOUSEBUTTONDOWN, event)
+        self._check_play_button(event.pos)
 
     # Respond to mouse events
     def _check_play_button(self, mouse_pos):
         """Start a new game when the player clicks Play."""
         button_clicked = self.play_button.rect.collidepoint(mouse_pos)
         if button_clicked and not self.game_active:
-            # Reset the game settings.
-            self._reset_game_settings()
-            self.game_active = True
-            self._reset_entities()
-            # Hide the mouse cursor.
-            pygame.mouse.set_visible(False)
+            self._start_game()
+
+    def _start_game(self):
+        """Reset the game and make it active."""
+        # Reset the game settings.
+        self._reset_game_settings()
+        self.game_active = True
+        self.session_start_tick = self.tick
+        self._reset_entities()
+        self.gc_policy.play_started()
+        # Hide the mouse cursor.
+        self._set_mouse_visible(False)
 
     def _reset_game_settings(self):
         """Reset the game settings to their initial values."""
@@ -157,6 +487,10 @@ class GameLogic:
         self.sb.prep_score()
         self.sb.prep_level()
         self.sb.prep_ships()
+        self.timers.clear()
+        self.ship_hit_paused = False
+        if self.rewind_buffer is not None:
+            self.rewind_buffer.clear()
 
 
     def _ship_hit(self):
@@ -166,41 +500,63 @@ class GameLogic:
             self.stats.ships_left -= 1
             self.sb.prep_ships()
             # Get rid of any remaining aliens and bullets.
-            self.bullets.empty()
-            self.aliens.empty()
+            self.bullet_manager.empty()
+            self.fleet_manager.empty()
             # Create a new fleet and centre the ship.
             self._create_fleet()
             self.ship.center_ship()
-            # Pause.
-            sleep(0.5)
+            # Pause, without blocking events or drawing.
+            self.ship_hit_paused = True
+            pause_ticks = round(self.settings.ship_hit_pause * self.settings.tick_rate)
+            self.timers.schedule(self.tick + pause_ticks, self._end_ship_hit_pause)
+            self.gc_policy.transition()
         else:
             self.game_active = False
-            pygame.mouse.set_visible(True)
+            self._end_session(self.settings.ship_limit + 1)
+            self._set_mouse_visible(True)
+            self.gc_policy.play_stopped()
+
+    def _end_session(self, ships_lost):
+        """Save the session just played to the score store, if it is on."""
+        if self.score_store is not None:
+            duration = (self.tick - self.session_start_tick) / self.settings.tick_rate
+            self.score_store.record_session(self.player_name, self.stats.score, self.stats.level,
+                                            duration, ships_lost)
+
+    def _set_mouse_visible(self, visible):
+        """Show or hide the mouse cursor, unless a SimulationThread runs the game; the main thread then does it."""
+        self.mouse_visible = visible
+        if self.simulation_thread is None:
+            pygame.mouse.set_visible(visible)
+
+    def _end_ship_hit_pause(self):
+        """Let the game carry on after the ship-hit pause."""
+        self.ship_hit_paused = False
 
     def _check_ship_alien_collisions(self):
         """Check for any aliens that have hit the ship. If so, get rid of the ship."""
-        if pygame.sprite.spritecollideany(self.ship, self.aliens):
+        if len(self.fleet_manager.collide_rect(self.ship.rect)):
             self._ship_hit()
 
     def _check_aliens_bottom(self):
         """Check if any aliens have reached the bottom of the screen."""
-        for alien in self.aliens.sprites():
-            if alien.rect.bottom >= self.settings.screen_height:
-                # Treat this the same as if the ship got hit.
-                self._ship_hit()
-                break
+        if self.fleet_manager.reached_bottom():
+            # Treat this the same as if the ship got hit.
+            self._ship_hit()
     
         # Check if all aliens have been destroyed, Create a new level if so.
-        if not self.aliens:
+        if not self.fleet_manager:
             self._start_new_level()
             
     def _start_new_level(self):
         """Start a new level by creating a new fleet and increasing difficulty."""
-        self.bullets.empty()
+        self.bullet_manager.empty()
+        # Move to the next level first, so the fleet uses its formation.
+        self.stats.level += 1
         self._create_fleet()
         self.settings.increase_speed()
-        self.stats.level += 1
         self.sb.prep_level()
+        self.gc_policy.transition()
 
 
 
@@ -1,23 +1,111 @@
+from time import perf_counter
+
+import pygame
+
 from core.game_logic import GameLogic
+from core.replay import PRESENTATION_KEYS
+from core.scheduler import FixedTimestep
+from core.sim_thread import SimulationThread
 
 class GameLoop:
-    def __init__(self):
+    def __init__(self, launched_at=None):
+        """
+        Create the game.
+
+        Args:
+        launched_at (float): perf_counter() time the program started, to
+            report the time to the first frame from; not reported if None.
+        """
         self.running = True
         self.game_state = "menu"  # Possible states: menu, playing, paused, game_over
+        self.launched_at = launched_at
+        # Seconds from launch until the first frame was on screen.
+        self.time_to_first_frame = None
+        self.first_frame_shown = False
         self.game = GameLogic()
 
     def run_game(self):
         """Start the main loop for the game."""
+        if self.game.settings.threaded_simulation:
+            self._run_threaded()
+            return
+        settings = self.game.settings
+        timestep = FixedTimestep(settings.tick_rate, settings.max_ticks_per_frame)
+        profiler = self.game.profiler
+        frame_budget = self.game.frame_budget
         while self.running:
-            self.game._check_events
-            if self.game.game_active:
-                self.game.update_game()
-
-                self.game.ship.update()
-                self.game._update_bullets()
-                self.game._update_aliens()
-            self.game._update_screen()
-            self.game.clock.tick(self.game.settings.frame_rate)  # Set the frame rate to the configured value
+            profiler.begin("check_events")
+            self.game._check_events()
+            profiler.end("check_events")
+            # Limit the frame rate to the configured value, and simulate
+            # as many fixed ticks as the time since the last frame covers.
+            frame_seconds = self.game.clock.tick(settings.frame_rate) / 1000
+            # Time the frame's work, not the wait for it, against the budget.
+            frame_budget.begin()
+            for _ in range(timestep.advance(frame_seconds)):
+                if self.game.game_active:
+                    self.game.update_game()
+            alpha = timestep.alpha if self.game.game_active else 1.0
+            self.game._update_screen(alpha)
+            self._first_frame_drawn()
+            profiler.end_frame()
+            self.game.memory_profiler.end_frame()
+            frame_budget.end()
+
+    def _run_threaded(self):
+        """
+        Run the simulation on a SimulationThread, and only handle events and draw here.
+
+        Quitting, full screen and the profiler stay on this thread, which
+        owns the display; every other input is passed to the simulation.
+        """
+        game = self.game
+        settings = game.settings
+        profiler = game.profiler
+        frame_budget = game.frame_budget
+        simulation = SimulationThread(game)
+        mouse_visible = None
+        simulation.start()
+        try:
+            while self.running:
+                profiler.begin("check_events")
+                for event in pygame.event.get():
+                    event = game._logical_event(event)
+                    if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN
+                                                     and event.key in PRESENTATION_KEYS):
+                        if event.type == pygame.QUIT or event.key == pygame.K_q:
+                            # Let the last tick finish before the game saves and exits.
+                            simulation.stop()
+                        game._handle_event(event)
+                    else:
+                        simulation.send(event)
+                profiler.end("check_events")
+                game.clock.tick(settings.frame_rate)
+                frame_budget.begin()
+                state = simulation.state
+                if state.mouse_visible != mouse_visible:
+                    mouse_visible = state.mouse_visible
+                    pygame.mouse.set_visible(mouse_visible)
+                alpha = state.alpha(perf_counter(), settings.tick_rate) if state.game_active else 1.0
+                game._update_screen(alpha, state)
+                self._first_frame_drawn()
+                profiler.end_frame()
+                game.memory_profiler.end_frame()
+                frame_budget.end()
+        finally:
+            simulation.stop()
+
+    def _first_frame_drawn(self):
+        """Once the first frame is on screen, report the time it took if asked to, and preload if set."""
+        if self.first_frame_shown:
+            return
+        self.first_frame_shown = True
+        if self.launched_at is not None:
+            self.time_to_first_frame = perf_counter() - self.launched_at
+            print(f"First frame {self.time_to_first_frame * 1000:.0f} ms after launch")
+        # Preloading waits until now so it does not hold up the first frame.
+        if self.game.settings.preload_assets:
+            self.game.asset_manager.preload('assets/manifest.json')
 
             
     def handle_events(self):
@@ -0,0 +1,239 @@
+import gc
+import os
+import tracemalloc
+from time import perf_counter_ns
+
+import numpy as np
+
+
+# Allocations are grouped by the game package that made them.
+GAME_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GROUPS = ("entities", "ui", "core", "other")
+
+
+class MemoryProfiler:
+    """
+    A class to track allocations per frame and garbage collector pauses.
+
+    Once started, tracemalloc records how much traced memory grew or shrank
+    during each frame, and the peak of short-lived allocations above where
+    the frame started. Grouping that memory by package (entities, ui, core,
+    and everything else) needs a snapshot, which takes time in proportion
+    to the blocks traced, so snapshots are taken only every group_interval
+    frames. Every collection is timed through gc.callbacks. Samples go into
+    ring buffers, like the FrameProfiler's. Tracing slows the game down a
+    lot, so it is off unless started.
+    """
+
+    def __init__(self, capacity=4096, group_interval=60):
+        """Initialise a stopped profiler that keeps the last capacity samples."""
+        self.enabled = False
+        self.capacity = capacity
+        self.group_interval = group_interval
+        # The package each traced file belongs to.
+        self.file_groups = {}
+        self.clear()
+
+    def clear(self):
+        """Forget every recorded sample."""
+        # Change in live bytes, and the short-lived peak, of each frame.
+        self.frame_bytes = np.zeros(self.capacity, dtype=np.int64)
+        self.frame_peaks = np.zeros(self.capacity, dtype=np.int64)
+        self.next_frame = 0
+        self.frame_count = 0
+        self.frame_start = 0
+        # Change in live bytes per group over each group interval.
+        self.group_bytes = np.zeros((self.capacity, len(GROUPS)), dtype=np.int64)
+        self.next_group = 0
+        self.group_count = 0
+        self.last_groups = None
+        self.frames_since_group = 0
+        # Generation, duration and objects collected of each collection.
+        self.gc_generations = np.zeros(self.capacity, dtype=np.int8)
+        self.gc_durations = np.zeros(self.capacity, dtype=np.int64)
+        self.gc_collected = np.zeros(self.capacity, dtype=np.int64)
+        self.next_gc = 0
+        self.gc_count = 0
+        self.gc_start = None
+
+    def start(self):
+        """Start tracing allocations and timing collections."""
+        if self.enabled:
+            return
+        self.enabled = True
+        tracemalloc.start()
+        gc.callbacks.append(self._on_gc)
+        self.last_groups = self._group_totals()
+        self._start_peak()
+
+    def stop(self):
+        """Stop tracing; the recorded samples are kept."""
+        if not self.enabled:
+            return
+        self.enabled = False
+        gc.callbacks.remove(self._on_gc)
+        tracemalloc.stop()
+
+    def end_frame(self):
+        """Record how much traced memory changed during the frame."""
+        if not self.enabled:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        i = self.next_frame
+        self.frame_bytes[i] = current - self.frame_start
+        self.frame_peaks[i] = peak - self.frame_start
+        self.next_frame = (i + 1) % self.capacity
+        self.frame_count = min(self.frame_count + 1, self.capacity)
+
+        self.frames_since_group += 1
+        if self.frames_since_group >= self.group_interval:
+            groups = self._group_totals()
+            self.group_bytes[self.next_group] = groups - self.last_groups
+            self.last_groups = groups
+            self.next_group = (self.next_group + 1) % self.capacity
+            self.group_count = min(self.group_count + 1, self.capacity)
+            self.frames_since_group = 0
+        self._start_peak()
+
+    def _start_peak(self):
+        """Measure the next frame from the memory in use now."""
+        # Snapshots allocate too, so this comes after taking one.
+        tracemalloc.reset_peak()
+        self.frame_start = tracemalloc.get_traced_memory()[0]
+
+    def _group_totals(self):
+        """Return the traced bytes currently live, per group."""
+        totals = np.zeros(len(GROUPS), dtype=np.int64)
+        snapshot = tracemalloc.take_snapshot()
+        for stat in snapshot.statistics('filename'):
+            totals[self._group_of(stat.traceback[0].filename)] += stat.size
+        return totals
+
+    def _group_of(self, filename):
+        """Return the index of the group a source file belongs to."""
+        group = self.file_groups.get(filename)
+        if group is None:
+            relative = os.path.relpath(filename, GAME_DIR)
+            package = relative.split(os.sep, 1)[0]
+            group = GROUPS.index(package) if package in GROUPS else GROUPS.index("other")
+            self.file_groups[filename] = group
+        return group
+
+    def _on_gc(self, phase, info):
+        """Time a collection; called by the garbage collector at its start and stop."""
+        if phase == "start":
+            self.gc_start = perf_counter_ns()
+            return
+        if self.gc_start is None:
+            return
+        i = self.next_gc
+        self.gc_generations[i] = info["generation"]
+        self.gc_durations[i] = perf_counter_ns() - self.gc_start
+        self.gc_collected[i] = info["collected"]
+        self.gc_start = None
+        self.next_gc = (i + 1) % self.capacity
+        self.gc_count = min(self.gc_count + 1, self.capacity)
+
+    def summary(self):
+        """
+        Summarise the recorded samples.
+
+        Returns:
+        dict: 'frame' and 'peak' are the mean and largest change in bytes
+            and short-lived peak per frame; 'groups' maps each group to
+            its mean change in bytes per frame; 'gc' maps each generation
+            to its number of collections and p50/max pause in milliseconds.
+        """
+        frames = self.frame_bytes[:self.frame_count]
+        peaks = self.frame_peaks[:self.frame_count]
+        frame_summary = peak_summary = None
+        if len(frames):
+            frame_summary = (float(frames.mean()), int(frames.max()))
+            peak_summary = (float(peaks.mean()), int(peaks.max()))
+
+        groups = self.group_bytes[:self.group_count]
+        group_summary = {}
+        if len(groups):
+            per_frame = groups.mean(axis=0) / self.group_interval
+            group_summary = dict(zip(GROUPS, per_frame.tolist()))
+
+        generations = self.gc_generations[:self.gc_count]
+        durations = self.gc_durations[:self.gc_count]
+        gc_summary = {}
+        for generation in range(3):
+            pauses = durations[generations == generation]
+            if len(pauses):
+                gc_summary[generation] = (len(pauses), float(np.percentile(pauses, 50)) / 1e6,
+                                          float(pauses.max()) / 1e6)
+        return {"frame": frame_summary, "peak": peak_summary, "groups": group_summary,
+                "gc": gc_summary}
+
+    def format_summary(self):
+        """Return the summary as readable text."""
+        summary = self.summary()
+        lines = [f"Allocations over {self.frame_count} frames (bytes/frame, mean / max):"]
+        for name in ("frame", "peak"):
+            if summary[name] is not None:
+                mean, largest = summary[name]
+                lines.append(f"  {name:<9}{mean:>12,.1f} / {largest:,}")
+        for group, mean in summary["groups"].items():
+            lines.append(f"  {group:<9}{mean:>12,.1f}")
+        lines.append("GC pauses (count, p50 / max ms):")
+        for generation, (count, p50, largest) in summary["gc"].items():
+            lines.append(f"  gen {generation}  {count:>6}  {p50:.3f} / {largest:.3f}")
+        if not summary["gc"]:
+            lines.append("  none")
+        return "\n".join(lines)
+
+
+class GCPolicy:
+    """
+    A class to decide when the garbage collector may run.
+
+    With the 'normal' policy the collector is left alone. 'defer' turns
+    automatic collection off during play. Breaks in play, like level
+    changes, the ship being hit and rewinds, collect only the young
+    generations, which is quick; the full collection waits for the Play
+    screen. 'freeze' moves every surviving object into the permanent
+    generation at those same points, so collections during play only look
+    at objects made since.
+    The collector is shared by the whole process, so games in one process
+    should use the same policy.
+    """
+
+    POLICIES = ("normal", "defer", "freeze")
+
+    def __init__(self, policy="normal"):
+        """Initialise the policy, checking its name."""
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown GC policy '{policy}'; expected one of {self.POLICIES}")
+        self.policy = policy
+
+    def play_started(self):
+        """Collect before play starts, then hold collections back."""
+        if self.policy == "normal":
+            return
+        gc.collect()
+        if self.policy == "defer":
+            gc.disable()
+        else:
+            gc.freeze()
+
+    def transition(self):
+        """Collect the young generations during a break in play, like a level change."""
+        if self.policy == "normal":
+            return
+        # A full collection can take long enough to drop frames; it waits for the Play screen.
+        gc.collect(1)
+        if self.policy == "freeze":
+            gc.freeze()
+
+    def play_stopped(self):
+        """Give the collector back its normal behaviour, and collect."""
+        if self.policy == "normal":
+            return
+        if self.policy == "defer":
+            gc.enable()
+        else:
+            gc.unfreeze()
+        gc.collect()
@@ -0,0 +1,135 @@
+import json
+import threading
+from time import perf_counter_ns
+
+import numpy as np
+
+
+class FrameProfiler:
+    """
+    A class to time the phases of each frame.
+
+    Phases are bracketed with begin() and end(); their timings go into a
+    fixed-size ring buffer of numpy arrays, so recording never allocates
+    and old samples are simply overwritten. While disabled, begin() and
+    end() return at once.
+
+    Phases may be timed on more than one thread, as when a SimulationThread
+    runs the game: each sample records the thread it was timed on, and a
+    lock keeps threads from writing into the same slot.
+    """
+
+    def __init__(self, capacity=32768):
+        """Initialise a disabled profiler that keeps the last capacity samples."""
+        self.enabled = False
+        self.capacity = capacity
+        # Phase names, and the id each sample stores instead of the name.
+        self.names = []
+        self.name_ids = {}
+        # Names of the threads samples were timed on, and the id each sample stores.
+        self.thread_names = []
+        self.thread_ids = {}
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """Forget every recorded sample."""
+        with self.lock:
+            self.sample_names = np.zeros(self.capacity, dtype=np.int32)
+            self.sample_threads = np.zeros(self.capacity, dtype=np.int32)
+            self.sample_starts = np.zeros(self.capacity, dtype=np.int64)
+            self.sample_durations = np.zeros(self.capacity, dtype=np.int64)
+            self.next_sample = 0
+            self.sample_count = 0
+            self.frame = 0
+            # Start times of the phases in progress, keyed by (thread, name).
+            self.starts = {}
+
+    def begin(self, name):
+        """Mark the start of a phase."""
+        if not self.enabled:
+            return
+        self.starts[threading.get_ident(), name] = perf_counter_ns()
+
+    def end(self, name):
+        """Mark the end of a phase and record how long it took."""
+        if not self.enabled:
+            return
+        now = perf_counter_ns()
+        thread = threading.get_ident()
+        start = self.starts.pop((thread, name), None)
+        if start is None:
+            # The profiler was enabled part way through this phase.
+            return
+        with self.lock:
+            name_id = self.name_ids.get(name)
+            if name_id is None:
+                name_id = self.name_ids[name] = len(self.names)
+                self.names.append(name)
+            thread_id = self.thread_ids.get(thread)
+            if thread_id is None:
+                thread_id = self.thread_ids[thread] = len(self.thread_names)
+                self.thread_names.append(threading.current_thread().name)
+
+            i = self.next_sample
+            self.sample_names[i] = name_id
+            self.sample_threads[i] = thread_id
+            self.sample_starts[i] = start
+            self.sample_durations[i] = now - start
+            self.next_sample = (i + 1) % self.capacity
+            self.sample_count = min(self.sample_count + 1, self.capacity)
+
+    def end_frame(self):
+        """Mark the end of a frame."""
+        if self.enabled:
+            self.frame += 1
+
+    def percentiles(self):
+        """
+        Summarise the recorded samples per phase.
+
+        Returns:
+        dict: Maps each phase name to its (p50, p99) duration in milliseconds.
+        """
+        with self.lock:
+            names = self.sample_names[:self.sample_count].copy()
+            durations = self.sample_durations[:self.sample_count].copy()
+            phase_names = list(self.names)
+        summary = {}
+        for name_id, name in enumerate(phase_names):
+            phase = durations[names == name_id]
+            if len(phase):
+                p50, p99 = np.percentile(phase, [50, 99]) / 1e6
+                summary[name] = (float(p50), float(p99))
+        return summary
+
+    def export_chrome_trace(self, file_path):
+        """Write the recorded samples as a Chrome trace (chrome://tracing, Perfetto)."""
+        with self.lock:
+            if self.sample_count < self.capacity:
+                order = np.arange(self.sample_count)
+            else:
+                # Oldest sample first once the ring buffer has wrapped.
+                order = (np.arange(self.capacity) + self.next_sample) % self.capacity
+            samples = zip(self.sample_names[order].tolist(), self.sample_threads[order].tolist(),
+                          self.sample_starts[order].tolist(), self.sample_durations[order].tolist())
+            names = list(self.names)
+            thread_names = list(self.thread_names)
+        # Name each thread's track.
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": 0, "tid": thread_id, "args": {"name": name}}
+            for thread_id, name in enumerate(thread_names)
+        ]
+        events += [
+            {
+                "name": names[name_id],
+                "ph": "X",
+                "ts": start / 1000,
+                "dur": duration / 1000,
+                "pid": 0,
+                "tid": thread_id,
+            }
+            for name_id, thread_id, start, duration in samples
+        ]
+        with open(file_path, 'w') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
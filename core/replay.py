@@ -0,0 +1,167 @@
+import json
+import struct
+
+import pygame
+
+
+class InputLog:
+    """
+    A class to record the inputs of a session so it can be replayed exactly.
+
+    The log holds the RNG seed and config the game was started with, and
+    a snapshot of the game if it did not start from scratch (as when
+    resumed from an autosave), then one fixed-size record per input, keyed
+    by the simulation tick at which the game handled it, and an end record
+    with the final tick and outcome.
+
+    File layout (little-endian):
+        header  b"AIRP", version u8, seed u64, config length u32,
+                snapshot length u32, config JSON, snapshot from save_state()
+        input   tick u32, kind u8, key or button u32, x i16, y i16
+        end     tick u32, kind 255, score u64, level u16, ships_left i16
+    """
+
+    MAGIC = b"AIRP"
+    VERSION = 2
+    HEADER = struct.Struct("<4sBQII")
+    RECORD = struct.Struct("<IBIhh")
+    END = struct.Struct("<IBQHh")
+
+    KEYDOWN, KEYUP, MOUSEBUTTONDOWN, END_OF_LOG = 0, 1, 2, 255
+    EVENT_TYPES = {KEYDOWN: pygame.KEYDOWN, KEYUP: pygame.KEYUP,
+                   MOUSEBUTTONDOWN: pygame.MOUSEBUTTONDOWN}
+
+    def __init__(self, seed, config, snapshot=b""):
+        """
+        Start an empty log for a game with the given seed and config.
+
+        Args:
+        snapshot (bytes): The game's state when recording started, from
+            save_state(); empty for a game started from scratch.
+        """
+        self.seed = seed
+        self.config = config
+        self.snapshot = snapshot
+        # Each input as (tick, kind, code, x, y).
+        self.records = []
+        # Set by finish() or load(): (tick, score, level, ships_left).
+        self.outcome = None
+
+    def record(self, tick, kind, event):
+        """Add an input handled at the given tick."""
+        if kind == self.MOUSEBUTTONDOWN:
+            x, y = event.pos
+            self.records.append((tick, kind, event.button, x, y))
+        else:
+            self.records.append((tick, kind, event.key, 0, 0))
+
+    def finish(self, game):
+        """Note the tick and outcome the session ended with."""
+        self.outcome = (game.tick, game.stats.score, game.stats.level, game.stats.ships_left)
+
+    def events(self):
+        """
+        Rebuild the recorded inputs.
+
+        Returns:
+        list: (tick, pygame event) for each input, in the order they were handled.
+        """
+        events = []
+        for tick, kind, code, x, y in self.records:
+            if kind == self.MOUSEBUTTONDOWN:
+                event = pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=code, pos=(x, y))
+            else:
+                event = pygame.event.Event(self.EVENT_TYPES[kind], key=code)
+            events.append((tick, event))
+        return events
+
+    def save(self, file_path):
+        """Write the log to a file."""
+        config = json.dumps(self.config).encode()
+        with open(file_path, 'wb') as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.VERSION, self.seed, len(config),
+                                     len(self.snapshot)))
+            f.write(config)
+            f.write(self.snapshot)
+            for record in self.records:
+                f.write(self.RECORD.pack(*record))
+            if self.outcome:
+                tick, score, level, ships_left = self.outcome
+                f.write(self.END.pack(tick, self.END_OF_LOG, score, level, ships_left))
+
+    @classmethod
+    def load(cls, file_path):
+        """Read a log written by save()."""
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        if len(data) < cls.HEADER.size or data[:4] != cls.MAGIC or data[4] != cls.VERSION:
+            raise ValueError(f"'{file_path}' is not an input log this version can read")
+        _, _, seed, config_length, snapshot_length = cls.HEADER.unpack_from(data)
+        offset = cls.HEADER.size
+        config = json.loads(data[offset:offset + config_length])
+        offset += config_length
+        log = cls(seed, config, data[offset:offset + snapshot_length])
+        offset += snapshot_length
+
+        while offset < len(data):
+            # The kind byte follows the tick in both record layouts.
+            if data[offset + 4] == cls.END_OF_LOG:
+                tick, _, score, level, ships_left = cls.END.unpack_from(data, offset)
+                log.outcome = (tick, score, level, ships_left)
+                offset += cls.END.size
+            else:
+                log.records.append(cls.RECORD.unpack_from(data, offset))
+                offset += cls.RECORD.size
+        return log
+
+
+# Keys that do not affect the simulation: quit, fullscreen and the profiler.
+PRESENTATION_KEYS = (pygame.K_q, pygame.K_f, pygame.K_F3)
+
+
+def replay(log, headless=True):
+    """
+    Replay a recorded session tick by tick.
+
+    Inputs are handled before the tick they were recorded at, exactly as
+    during recording, starting from the log's snapshot if it has one.
+    Headless replays run as fast as possible; otherwise each tick is drawn
+    and paced at the tick rate.
+
+    Returns:
+    GameLogic: The game, in the state the session ended in.
+    """
+    from core.game_logic import GameLogic
+    from core.snapshot import load_state
+
+    # A replay is not a new session, so it is kept out of the score store.
+    game = GameLogic(headless=headless, config_overrides=dict(log.config, score_store_path=""),
+                     seed=log.seed)
+    if log.snapshot:
+        load_state(game, log.snapshot)
+    events = log.events()
+    end_tick = log.outcome[0] if log.outcome else (events[-1][0] if events else 0)
+    next_event = 0
+    while True:
+        while next_event < len(events) and events[next_event][0] == game.tick:
+            event = events[next_event][1]
+            next_event += 1
+            # Quitting ends the recording, not the replay, and keys that only
+            # change the presentation have nothing to replay.
+            if event.type == pygame.KEYDOWN and event.key in PRESENTATION_KEYS:
+                continue
+            game._handle_event(event)
+        if game.tick >= end_tick:
+            break
+        if not game.game_active:
+            raise RuntimeError(f"Replay stalled at tick {game.tick}: the game is not active")
+        game.update_game()
+        if not headless:
+            game._update_screen()
+            game.clock.tick(game.settings.tick_rate)
+    return game
+
+
+def matches_outcome(log, game):
+    """Return True if the replayed game ended as the recorded session did."""
+    return log.outcome == (game.tick, game.stats.score, game.stats.level, game.stats.ships_left)
@@ -0,0 +1,72 @@
+import heapq
+import itertools
+
+
+class FixedTimestep:
+    """
+    A class to run the simulation at a fixed rate, whatever the frame rate.
+
+    Real frame time is added to an accumulator which is spent in whole
+    simulation ticks; what is left over gives the interpolation factor
+    used to draw between the last two ticks.
+    """
+
+    def __init__(self, tick_rate, max_ticks_per_frame):
+        """Initialise the timestep for tick_rate ticks per second."""
+        self.tick_seconds = 1.0 / tick_rate
+        # Cap on ticks run for one frame, so a slow frame cannot snowball.
+        self.max_ticks_per_frame = max_ticks_per_frame
+        self.accumulator = 0.0
+        # Simulation time thrown away because of the cap.
+        self.dropped_seconds = 0.0
+
+    def advance(self, frame_seconds):
+        """
+        Add the time taken by the last frame.
+
+        Returns:
+        int: The number of ticks to simulate before drawing this frame.
+        """
+        self.accumulator += frame_seconds
+        ticks = int(self.accumulator / self.tick_seconds)
+        if ticks > self.max_ticks_per_frame:
+            self.dropped_seconds += (ticks - self.max_ticks_per_frame) * self.tick_seconds
+            ticks = self.max_ticks_per_frame
+            # Keep only the fraction of a tick, so we do not try to catch up.
+            self.accumulator %= self.tick_seconds
+        else:
+            self.accumulator -= ticks * self.tick_seconds
+        return ticks
+
+    @property
+    def alpha(self):
+        """How far, from 0 to 1, the frame is between the last tick and the next."""
+        return min(self.accumulator / self.tick_seconds, 1.0)
+
+
+class TimerQueue:
+    """A class to run callbacks once the simulation reaches a given tick."""
+
+    def __init__(self):
+        """Initialise an empty queue."""
+        self.timers = []
+        # Breaks ties so timers due on the same tick run in the order added.
+        self.counter = itertools.count()
+
+    def __len__(self):
+        """Return the number of pending timers."""
+        return len(self.timers)
+
+    def schedule(self, tick, callback):
+        """Run callback once the simulation reaches tick."""
+        heapq.heappush(self.timers, (tick, next(self.counter), callback))
+
+    def run_due(self, tick):
+        """Run every callback that is due at or before tick."""
+        while self.timers and self.timers[0][0] <= tick:
+            _, _, callback = heapq.heappop(self.timers)
+            callback()
+
+    def clear(self):
+        """Drop every pending timer."""
+        self.timers.clear()
@@ -0,0 +1,231 @@
+import argparse
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import closing
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    ships_lost INTEGER NOT NULL,
+    ended_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_by_score ON sessions (score DESC);
+CREATE INDEX IF NOT EXISTS sessions_by_player ON sessions (player, score DESC);
+"""
+
+# Columns returned for each session by the queries.
+COLUMNS = ("player", "score", "level", "duration", "ships_lost", "ended_at")
+
+# SQLite integers are 64-bit; larger scores are kept as this.
+MAX_SCORE = 2 ** 63 - 1
+
+
+class ScoreStore:
+    """
+    A class to keep high scores and the stats of every session in an SQLite database.
+
+    Only the best score is read when the store opens; it is kept in memory
+    from then on. Writes are queued and made by a background thread with a
+    connection of its own, each batch of queued writes in one transaction,
+    so saving a session never waits on the disk. Queries open their own
+    connection; the database is in WAL mode, so they do not hold up the
+    writer. Call flush() first for a query to include queued writes.
+    """
+
+    def __init__(self, path):
+        """Open or create the store at path and start its writer thread."""
+        self.path = path
+        with closing(self._connect()) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            self.best_score, self.sessions_at_open = connection.execute(
+                "SELECT COALESCE(MAX(score), 0), COUNT(*) FROM sessions").fetchone()
+        self.jobs = queue.Queue()
+        self.writer = threading.Thread(target=self._write_jobs, name="score-store", daemon=True)
+        self.writer.start()
+
+    def _connect(self):
+        """Open a connection to the database, committing each statement unless in a transaction."""
+        connection = sqlite3.connect(self.path, isolation_level=None)
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def record_session(self, player, score, level, duration, ships_lost):
+        """
+        Queue a finished session to be saved, and keep its score if it is the best.
+
+        Args:
+        player (str): Who played.
+        duration (float): Seconds of play.
+        ships_lost (int): Ships lost over the session.
+        """
+        self.best_score = max(self.best_score, score)
+        row = (str(player), min(int(score), MAX_SCORE), int(level), float(duration),
+               int(ships_lost), time.time())
+        self.jobs.put(lambda connection: connection.execute(
+            "INSERT INTO sessions (player, score, level, duration, ships_lost, ended_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)", row))
+
+    def compact(self, keep_recent=10000, keep_best=10):
+        """
+        Queue dropping old sessions, keeping the keep_recent latest and each player's keep_best best.
+
+        The file is then rewritten to give back the space, if anything was dropped.
+        """
+        self.jobs.put(lambda connection: self._compact(connection, keep_recent, keep_best))
+
+    def _compact(self, connection, keep_recent, keep_best):
+        """Drop old sessions as compact() describes; runs on the writer thread."""
+        dropped = connection.execute("""
+            DELETE FROM sessions
+            WHERE id NOT IN (SELECT id FROM sessions ORDER BY id DESC LIMIT ?)
+              AND id NOT IN (SELECT id FROM (
+                  SELECT id, ROW_NUMBER() OVER (PARTITION BY player ORDER BY score DESC) AS rank
+                  FROM sessions) WHERE rank <= ?)
+            """, (keep_recent, keep_best)).rowcount
+        if dropped:
+            return "VACUUM"
+        return None
+
+    def _write_jobs(self):
+        """Make the queued writes until close() is called."""
+        connection = self._connect()
+        while True:
+            jobs = [self.jobs.get()]
+            # Take everything else already queued, to write it all in one transaction.
+            while True:
+                try:
+                    jobs.append(self.jobs.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in jobs
+            after = []
+            try:
+                with connection:
+                    connection.execute("BEGIN")
+                    for job in jobs:
+                        if job is None:
+                            continue
+                        # A bad job is reported and skipped, so the thread lives on and flush() returns.
+                        try:
+                            after.append(job(connection))
+                        except Exception as e:
+                            print(f"Could not save to the score store {self.path}: {e!r}", file=sys.stderr)
+                # VACUUM cannot run inside a transaction.
+                if "VACUUM" in after:
+                    connection.execute("VACUUM")
+            except Exception as e:
+                print(f"Could not save to the score store {self.path}: {e!r}", file=sys.stderr)
+            finally:
+                for _ in jobs:
+                    self.jobs.task_done()
+            if stop:
+                connection.close()
+                return
+
+    def flush(self):
+        """Wait until every queued write has been made."""
+        self.jobs.join()
+
+    def close(self):
+        """Make the queued writes and stop the writer thread."""
+        if self.writer.is_alive():
+            self.jobs.put(None)
+            self.writer.join()
+
+    def _query(self, sql, parameters=()):
+        """Run a query on a connection of its own, returning a dict per row."""
+        with closing(self._connect()) as connection:
+            cursor = connection.execute(sql, parameters)
+            names = [column[0] for column in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def top(self, k=10):
+        """
+        Return the k best sessions of all time.
+
+        Returns:
+        list: A dict of COLUMNS per session, best first.
+        """
+        return self._query(f"SELECT {', '.join(COLUMNS)} FROM sessions "
+                           "ORDER BY score DESC LIMIT ?", (k,))
+
+    def player_top(self, player, k=10):
+        """
+        Return a player's k best sessions.
+
+        Returns:
+        list: A dict of COLUMNS per session, best first.
+        """
+        return self._query(f"SELECT {', '.join(COLUMNS)} FROM sessions "
+                           "WHERE player = ? ORDER BY score DESC LIMIT ?", (player, k))
+
+    def player_summary(self, player):
+        """
+        Return a player's totals over every session kept.
+
+        Returns:
+        dict: sessions, best_score, mean_score, best_level, play_seconds and ships_lost.
+        """
+        return self._query("SELECT COUNT(*) AS sessions, COALESCE(MAX(score), 0) AS best_score, "
+                           "COALESCE(AVG(score), 0) AS mean_score, COALESCE(MAX(level), 0) AS best_level, "
+                           "COALESCE(SUM(duration), 0) AS play_seconds, "
+                           "COALESCE(SUM(ships_lost), 0) AS ships_lost "
+                           "FROM sessions WHERE player = ?", (player,))[0]
+
+    def session_count(self):
+        """Return the number of sessions kept."""
+        return self._query("SELECT COUNT(*) AS sessions FROM sessions")[0]["sessions"]
+
+
+def format_sessions(sessions):
+    """Return sessions as a readable table."""
+    lines = [f"{'#':>3} {'player':<16} {'score':>14} {'level':>6} {'seconds':>8} {'lost':>5}  ended"]
+    for rank, session in enumerate(sessions, 1):
+        ended = time.strftime("%Y-%m-%d %H:%M", time.localtime(session["ended_at"]))
+        lines.append(f"{rank:>3} {session['player']:<16} {session['score']:>14,} {session['level']:>6} "
+                     f"{session['duration']:>8.0f} {session['ships_lost']:>5}  {ended}")
+    return "\n".join(lines)
+
+
+def main():
+    from assets.utils import resolve_path
+    from core.settings import Settings
+
+    parser = argparse.ArgumentParser(description="Show the leaderboard and session stats.")
+    parser.add_argument("--path", help="Score store to read; defaults to score_store_path in the config, "
+                                       "taken from the game folder.")
+    parser.add_argument("--top", type=int, default=10, help="Number of sessions to list.")
+    parser.add_argument("--player", help="Only list this player's sessions, with their totals.")
+    parser.add_argument("--compact", action="store_true",
+                        help="Drop old sessions, keeping score_store_keep_sessions and every player's best.")
+    args = parser.parse_args()
+
+    settings = Settings()
+    store = ScoreStore(args.path or resolve_path(settings.score_store_path))
+    if args.compact:
+        before = store.session_count()
+        store.compact(settings.score_store_keep_sessions)
+        store.flush()
+        print(f"Kept {store.session_count():,} of {before:,} sessions")
+    if args.player:
+        summary = store.player_summary(args.player)
+        print(f"{args.player}: {summary['sessions']:,} sessions, best {summary['best_score']:,}, "
+              f"mean {summary['mean_score']:,.0f}, best level {summary['best_level']}, "
+              f"{summary['play_seconds'] / 60:,.0f} minutes played, {summary['ships_lost']:,} ships lost")
+        print(format_sessions(store.player_top(args.player, args.top)))
+    else:
+        print(format_sessions(store.top(args.top)))
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
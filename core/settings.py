@@ -1,13 +1,47 @@
+import copy
 import json
+import os
+
+
+# config.json lives in the assets folder next to this package, wherever the game is run from.
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'assets', 'config.json')
+
+# The parsed config, read once per process.
+_config = None
+
+
+def load_config():
+    """
+    Return a copy of the config, reading and checking config.json only the first time.
+
+    Returns:
+    dict: The config values, copied all the way down, so the caller may
+        change them, lists included.
+    """
+    global _config
+    if _config is None:
+        with open(CONFIG_PATH, 'r') as f:
+            config = json.load(f)
+        if not isinstance(config, dict):
+            raise ValueError(f"{CONFIG_PATH} must hold a JSON object, not {type(config).__name__}")
+        _config = config
+    return copy.deepcopy(_config)
 
 
 class Settings:
     """A class to store al settings for Alien Invasion."""
 
-    def __init__(self):
-        """Loads the config settings and Initialise the game's settings."""
-        with open('assets/config.json', 'r') as f:
-            self.config = json.load(f)
+    def __init__(self, overrides=None):
+        """
+        Loads the config settings and Initialise the game's settings.
+
+        Args:
+        overrides (dict): Optional config values that replace those in config.json.
+        """
+        self.config = load_config()
+        if overrides:
+            self.config.update(overrides)
 
         # Initialise the static settings
         self.initialize_static_settings()
@@ -21,6 +55,8 @@ class Settings:
         self.alien_speed = 1.0
         # fleet_direction of 1 represents right; -1 represents left.
         self.fleet_direction = 1
+        # Scoring grows each level, so it starts again with each game.
+        self.alien_points = self.config['alien_points']
 
     def initialize_static_settings(self):
         """Initialize settings that do not change throughout the game."""
@@ -30,20 +66,51 @@ class Settings:
         self.screen_height = self.config['screen_height']
         self.bg_color = self.config['bg_color']
         self.frame_rate = self.config['frame_rate']
+        # Simulation settings
+        self.tick_rate = self.config['tick_rate']
+        self.max_ticks_per_frame = self.config['max_ticks_per_frame']
+        # Simulate on a thread of its own, so slow frames do not delay ticks.
+        self.threaded_simulation = self.config['threaded_simulation']
+        self.ship_hit_pause = self.config['ship_hit_pause']
+        # Where the frame profiler saves its Chrome trace.
+        self.profile_trace_path = self.config['profile_trace_path']
+        self.dirty_rendering = self.config['dirty_rendering']
+        # Lower the render quality when frames run over budget: render scales
+        # to step down through, then the most projectiles to draw.
+        self.adaptive_quality = self.config['adaptive_quality']
+        self.render_scales = self.config['render_scales']
+        self.projectile_cap = self.config['projectile_cap']
+        # When the garbage collector may run: 'normal', 'defer' or 'freeze'.
+        self.gc_policy = self.config['gc_policy']
+        # Seconds of play kept for rewinding with Backspace; 0 turns it off.
+        self.rewind_seconds = self.config['rewind_seconds']
+        # Where to save the game every autosave_seconds; empty turns it off.
+        self.autosave_path = self.config['autosave_path']
+        self.autosave_seconds = self.config['autosave_seconds']
+        # Where high scores and session stats are kept; empty turns it off.
+        self.score_store_path = self.config['score_store_path']
+        self.score_store_keep_sessions = self.config['score_store_keep_sessions']
+        self.player_name = self.config['player_name']
+        # Asset settings
+        self.asset_cache_bytes = self.config['asset_cache_bytes']
+        # Decode every image in assets/manifest.json once the first frame is shown.
+        self.preload_assets = self.config['preload_assets']
         # Initalise the Entity settings
         # Ship settings
         self.ship_limit = self.config['ship_limit']
         # Alien settings
         self.fleet_drop_speed = self.config['fleet_drop_speed']
+        # Fleet layouts per level, as rows of 'X' (alien) and '.' (gap);
+        # empty to fill the screen with aliens on every level.
+        self.formations = self.config['formations']
         # Bullet settings
         self.bullet_width = self.config['bullet_width']
         self.bullet_height = self.config['bullet_height']
         self.bullet_color = self.config['bullet_color']
         self.bullets_allowed = self.config['bullets_allowed']
         # Scoring settings
-        self.alien_points = 50
-        self.speedup_scale = 1.1
-        self.score_scale = 1.5    
+        self.speedup_scale = self.config['speedup_scale']
+        self.score_scale = self.config['score_scale']
         
 
     def increase_speed(self):
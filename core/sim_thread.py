@@ -0,0 +1,149 @@
+import math
+import threading
+import time
+from collections import deque
+from time import perf_counter
+
+from core.scheduler import FixedTimestep
+from entities.fleet_manager import rect_round
+
+
+class RenderState:
+    """
+    A class to hold everything needed to draw one tick, copied from a game.
+
+    A RenderState is never changed once captured, so the main thread can
+    draw one while the simulation thread moves the game on. It keeps the
+    same previous and latest positions the game itself draws between, so
+    drawing it gives the same pixels as drawing the game at that tick.
+    """
+
+    def __init__(self, game, captured_at):
+        """Copy what is drawn of the game as it is now."""
+        self.tick = game.tick
+        self.captured_at = captured_at
+        self.game_active = game.game_active
+        self.mouse_visible = game.mouse_visible
+
+        ship = game.ship
+        self.ship_x, self.ship_prev_x, self.ship_y = ship.x, ship.prev_x, ship.rect.y
+
+        fleet = game.fleet_manager
+        self.alien_x = fleet.x[fleet.alive]
+        self.alien_y = fleet.y[fleet.alive]
+        self.alien_x.setflags(write=False)
+        self.alien_y.setflags(write=False)
+        # The fleet moves as one, so this is how far every alien moved this tick.
+        self.fleet_shift = (fleet.offset_x - fleet.prev_offset_x, fleet.offset_y - fleet.prev_offset_y)
+
+        self.bullets = tuple((bullet.rect.x, bullet.rect.y, bullet.y, bullet.prev_y)
+                             for bullet in game.bullet_manager.bullets)
+
+        # The scoreboard's images are replaced, never changed, when it is re-rendered.
+        self.hud = tuple((image, rect.copy()) for image, rect in game.sb.images())
+
+    def alpha(self, now, tick_rate):
+        """How far, from 0 to 1, to draw between the previous tick and this one at time now."""
+        return min((now - self.captured_at) * tick_rate, 1.0)
+
+    def draw_sprites(self, game, screen, alpha=1.0, limit=None):
+        """
+        Draw the bullets, ship and aliens with the game's images, alpha of the way from the last tick.
+
+        Args:
+        limit (int): Draw at most this many bullets; None draws them all.
+        """
+        bullets = self.bullets if limit is None else self.bullets[:limit]
+        image = game.bullet_manager._get_bullet_image()
+        if alpha == 1.0:
+            blits = [(image, (x, rect_y)) for x, rect_y, _, _ in bullets]
+        else:
+            blits = [(image, (x, round(prev_y + (y - prev_y) * alpha))) for x, _, y, prev_y in bullets]
+        screen.blits(blits, doreturn=False)
+
+        # Round halves up like Ship.blitme() and the rect do.
+        ship_x = self.ship_prev_x + (self.ship_x - self.ship_prev_x) * alpha
+        screen.blit(game.ship.image, (math.floor(ship_x + 0.5), self.ship_y))
+
+        shift_x = self.fleet_shift[0] * (alpha - 1)
+        shift_y = self.fleet_shift[1] * (alpha - 1)
+        image = game.fleet_manager.image
+        positions = zip(rect_round(self.alien_x + shift_x).tolist(),
+                        rect_round(self.alien_y + shift_y).tolist())
+        screen.blits([(image, position) for position in positions], doreturn=False)
+
+
+class SimulationThread:
+    """
+    A class to run a game's simulation on its own thread.
+
+    The thread runs fixed ticks on its own clock, handling the inputs sent
+    to it before each tick, and after the ticks due publishes a new
+    RenderState. The main thread, which owns the display, draws the latest
+    one while the next is being simulated; handing one over is a single
+    reference swap. Inputs go the other way through a deque, whose append()
+    and popleft() are safe across threads without a lock. A slow frame or
+    a wait for vsync on the main thread so no longer holds back ticks, and
+    pygame lets other threads run while it fills, blits, scales and flips.
+    """
+
+    def __init__(self, game):
+        """Initialise the thread for a game; call start() to run it."""
+        self.game = game
+        self.inputs = deque()
+        self.state = RenderState(game, perf_counter())
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        """Start simulating; the game's display now belongs to the main thread alone."""
+        self.game.simulation_thread = self
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="simulation", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop simulating, waiting for the tick in progress to finish."""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.game.simulation_thread = None
+
+    def send(self, event):
+        """Pass an input event to the simulation, to be handled before its next tick."""
+        self.inputs.append(event)
+
+    def call(self, function):
+        """Have the simulation thread call function before its next tick, to change what it owns."""
+        self.inputs.append(function)
+
+    def _run(self):
+        """Simulate and publish render states until stopped."""
+        game = self.game
+        settings = game.settings
+        timestep = FixedTimestep(settings.tick_rate, settings.max_ticks_per_frame)
+        tick_seconds = 1 / settings.tick_rate
+        last = perf_counter()
+        while self.running:
+            now = perf_counter()
+            ticks = timestep.advance(now - last)
+            last = now
+            for _ in range(ticks):
+                self._handle_inputs()
+                if game.game_active:
+                    game.update_game()
+            if ticks:
+                self.state = RenderState(game, perf_counter())
+            # Sleep until the next tick is due.
+            time.sleep((1 - timestep.alpha) * tick_seconds)
+
+    def _handle_inputs(self):
+        """Hand the inputs received since the last tick to the game, and make any calls asked for."""
+        inputs = self.inputs
+        while inputs:
+            item = inputs.popleft()
+            if callable(item):
+                item()
+            else:
+                self.game._handle_event(item)
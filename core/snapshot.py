@@ -0,0 +1,275 @@
+import os
+import struct
+import zlib
+from collections import deque
+
+import numpy as np
+
+
+MAGIC = b"AIGS"
+VERSION = 1
+# Everything but the per-alien and per-bullet arrays; see save_state().
+STATE = struct.Struct("<4sBIBIQQIhdddbQddddddII")
+# Flag bits.
+GAME_ACTIVE, SHIP_HIT_PAUSED, MOVING_RIGHT, MOVING_LEFT = 1, 2, 4, 8
+# pause_end when no ship-hit pause is pending.
+NO_TIMER = 0xFFFFFFFF
+
+
+def save_state(game):
+    """
+    Pack the whole state of a game into bytes.
+
+    Layout (little-endian):
+        magic b"AIGS", version u8, tick u32, flags u8, pause_end u32,
+        score u64, high_score u64, level u32, ships_left i16,
+        ship_speed f64, bullet_speed f64, alien_speed f64,
+        fleet_direction i8, alien_points u64,
+        ship x f64, ship prev_x f64, fleet offset x/y f64, previous offset x/y f64,
+        alien count u32, bullet count u32,
+        alien x f64[aliens], alien y f64[aliens], alive bits u8[(aliens + 7) // 8],
+        bullet rect x i32[bullets], bullet y f64[bullets], bullet prev_y f64[bullets]
+
+    Returns:
+    bytes: The snapshot, for load_state().
+    """
+    stats, settings, ship = game.stats, game.settings, game.ship
+    fleet, bullets = game.fleet_manager, game.bullet_manager.bullets
+    flags = ((GAME_ACTIVE if game.game_active else 0) |
+             (SHIP_HIT_PAUSED if game.ship_hit_paused else 0) |
+             (MOVING_RIGHT if ship.moving_right else 0) |
+             (MOVING_LEFT if ship.moving_left else 0))
+    header = STATE.pack(
+        MAGIC, VERSION, game.tick, flags, _pause_end(game),
+        stats.score, stats.high_score, stats.level, stats.ships_left,
+        settings.ship_speed, settings.bullet_speed, settings.alien_speed,
+        settings.fleet_direction, settings.alien_points,
+        ship.x, ship.prev_x, fleet.offset_x, fleet.offset_y,
+        fleet.prev_offset_x, fleet.prev_offset_y,
+        len(fleet.x), len(bullets))
+    return b"".join((
+        header,
+        fleet.x.tobytes(),
+        fleet.y.tobytes(),
+        np.packbits(fleet.alive).tobytes(),
+        np.array([bullet.rect.x for bullet in bullets], dtype=np.int32).tobytes(),
+        np.array([bullet.y for bullet in bullets], dtype=np.float64).tobytes(),
+        np.array([bullet.prev_y for bullet in bullets], dtype=np.float64).tobytes(),
+    ))
+
+
+def _pause_end(game):
+    """Return the tick the ship-hit pause ends at, or NO_TIMER."""
+    for tick, _, callback in game.timers.timers:
+        if callback == game._end_ship_hit_pause:
+            return tick
+    return NO_TIMER
+
+
+def load_state(game, data, keep_tick=False):
+    """
+    Put a game back in the state saved by save_state().
+
+    The game must use the same config as the one saved, so its fleet has
+    the same layout.
+
+    Args:
+    data (bytes): A snapshot from save_state().
+    keep_tick (bool): Leave the game's tick counter running on instead of
+        setting it back, moving any pending timer to match; used by rewind
+        so recorded inputs stay in tick order.
+    """
+    (magic, version, tick, flags, pause_end,
+     score, high_score, level, ships_left,
+     ship_speed, bullet_speed, alien_speed, fleet_direction, alien_points,
+     ship_x, ship_prev_x, offset_x, offset_y, prev_offset_x, prev_offset_y,
+     alien_count, bullet_count) = STATE.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a game snapshot this version can read")
+
+    offset = STATE.size
+    alien_x = np.frombuffer(data, np.float64, alien_count, offset)
+    offset += alien_x.nbytes
+    alien_y = np.frombuffer(data, np.float64, alien_count, offset)
+    offset += alien_y.nbytes
+    alive_bits = np.frombuffer(data, np.uint8, (alien_count + 7) // 8, offset)
+    alive = np.unpackbits(alive_bits, count=alien_count).astype(bool)
+    offset += alive_bits.nbytes
+    bullet_x = np.frombuffer(data, np.int32, bullet_count, offset)
+    offset += bullet_x.nbytes
+    bullet_y = np.frombuffer(data, np.float64, bullet_count, offset)
+    offset += bullet_y.nbytes
+    bullet_prev_y = np.frombuffer(data, np.float64, bullet_count, offset)
+
+    if keep_tick:
+        # Timers are keyed by tick, so shift them along with the clock.
+        if pause_end != NO_TIMER:
+            pause_end += game.tick - tick
+    else:
+        game.tick = tick
+    was_active = game.game_active
+    game.game_active = bool(flags & GAME_ACTIVE)
+    game.ship_hit_paused = bool(flags & SHIP_HIT_PAUSED)
+    game.timers.clear()
+    if pause_end != NO_TIMER:
+        game.timers.schedule(pause_end, game._end_ship_hit_pause)
+
+    settings = game.settings
+    settings.ship_speed, settings.bullet_speed = ship_speed, bullet_speed
+    settings.alien_speed, settings.fleet_direction = alien_speed, fleet_direction
+    settings.alien_points = alien_points
+
+    # Only re-render the scoreboard images that changed.
+    stats, sb = game.stats, game.sb
+    changed = (stats.score != score, stats.high_score != high_score,
+               stats.level != level, stats.ships_left != ships_left)
+    stats.score, stats.high_score = score, high_score
+    stats.level, stats.ships_left = level, ships_left
+    if changed[0]:
+        sb.prep_score()
+    if changed[1]:
+        sb.prep_high_score()
+    if changed[2]:
+        sb.prep_level()
+    if changed[3]:
+        sb.prep_ships()
+
+    ship = game.ship
+    ship.x, ship.prev_x = ship_x, ship_prev_x
+    ship.rect.x = ship.x
+    ship.moving_right = bool(flags & MOVING_RIGHT)
+    ship.moving_left = bool(flags & MOVING_LEFT)
+
+    # The fleet's level was restored above, so it rebuilds on the right formation.
+    game.fleet_manager.restore(alien_x, alien_y, alive, (offset_x, offset_y),
+                               (prev_offset_x, prev_offset_y))
+    game.bullet_manager.restore(bullet_x.tolist(), bullet_y.tolist(), bullet_prev_y.tolist())
+
+    # Jumping to another state is a break in play, or a start or end of it.
+    if game.game_active and not was_active:
+        game.gc_policy.play_started()
+    elif was_active and not game.game_active:
+        game.gc_policy.play_stopped()
+    else:
+        game.gc_policy.transition()
+
+
+def save_state_file(game, file_path):
+    """Write a snapshot of the game to a file, replacing it only once fully written."""
+    temp_path = file_path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(save_state(game))
+    os.replace(temp_path, file_path)
+
+
+def load_state_file(game, file_path):
+    """Put a game back in the state saved by save_state_file()."""
+    with open(file_path, 'rb') as f:
+        load_state(game, f.read())
+
+
+def _xor(a, b):
+    """Return the bytes of a XOR b, the shorter one padded with zeros."""
+    out = np.zeros(max(len(a), len(b)), dtype=np.uint8)
+    out[:len(a)] = np.frombuffer(a, np.uint8)
+    out[:len(b)] ^= np.frombuffer(b, np.uint8)
+    return out.tobytes()
+
+
+class RewindBuffer:
+    """
+    A class to keep the last few seconds of game states for rewinding.
+
+    record() saves a snapshot every interval ticks. Most are stored as the
+    XOR of their bytes against the snapshot before, compressed with zlib:
+    from one tick to the next most of the state is unchanged, so these are
+    largely zeros and pack down small. Every keyframe_interval entries a
+    whole snapshot is kept instead, so rebuilding one never undoes more
+    than that many deltas. Once the buffer covers the given number of
+    seconds, the oldest entries drop off the front.
+    """
+
+    def __init__(self, game, seconds, interval=1, keyframe_interval=60):
+        """Initialise an empty buffer covering the given number of seconds."""
+        self.game = game
+        self.interval = interval
+        self.keyframe_interval = keyframe_interval
+        self.capacity = max(1, round(seconds * game.settings.tick_rate / interval))
+        # Entries as (keyframe, length, payload); a keyframe's payload is the snapshot itself.
+        self.entries = deque()
+        self.last = None
+        self.since_keyframe = 0
+
+    def __len__(self):
+        """Return the number of snapshots held."""
+        return len(self.entries)
+
+    def nbytes(self):
+        """Return the number of bytes the stored snapshots take up."""
+        return sum(len(payload) for _, _, payload in self.entries)
+
+    def record(self):
+        """Save the game's state, if it is a tick to save on."""
+        if self.game.tick % self.interval:
+            return
+        state = save_state(self.game)
+        if self.last is None or self.since_keyframe >= self.keyframe_interval:
+            self.entries.append((True, len(state), state))
+            self.since_keyframe = 0
+        else:
+            self.entries.append((False, len(state), zlib.compress(_xor(self.last, state), 1)))
+        self.since_keyframe += 1
+        self.last = state
+        if len(self.entries) > self.capacity:
+            self._drop_oldest()
+
+    def _drop_oldest(self):
+        """Drop the oldest entry, turning the next one into a keyframe if it was a delta."""
+        _, _, oldest = self.entries.popleft()
+        if self.entries and not self.entries[0][0]:
+            _, length, delta = self.entries[0]
+            self.entries[0] = (True, length, _xor(oldest, zlib.decompress(delta))[:length])
+
+    def _state_at(self, index):
+        """Rebuild the snapshot held at the given entry."""
+        start = index
+        while not self.entries[start][0]:
+            start -= 1
+        state = self.entries[start][2]
+        for position in range(start + 1, index + 1):
+            _, length, delta = self.entries[position]
+            state = _xor(state, zlib.decompress(delta))[:length]
+        return state
+
+    def rewind(self, seconds):
+        """
+        Put the game back as it was about the given number of seconds ago.
+
+        Snapshots newer than the one restored are dropped, and the game's
+        tick counter keeps running on.
+
+        Returns:
+        bool: False if there was nothing to rewind to.
+        """
+        if not self.entries:
+            return False
+        steps = round(seconds * self.game.settings.tick_rate / self.interval)
+        index = max(len(self.entries) - 1 - steps, 0)
+        state = self._state_at(index)
+        while len(self.entries) > index + 1:
+            self.entries.pop()
+        self.last = state
+        # Count back to the keyframe the kept entries end on.
+        self.since_keyframe = 0
+        for keyframe, _, _ in reversed(self.entries):
+            self.since_keyframe += 1
+            if keyframe:
+                break
+        load_state(self.game, state, keep_tick=True)
+        return True
+
+    def clear(self):
+        """Forget every snapshot."""
+        self.entries.clear()
+        self.last = None
+        self.since_keyframe = 0
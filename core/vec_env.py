@@ -0,0 +1,393 @@
+import os
+
+import numpy as np
+import pygame
+
+from entities.fleet_manager import rect_round
+
+
+class VecGameEnv:
+    """
+    A class to step many independent headless games with one call, for training agents.
+
+    Each step takes one action per game and returns observations, the
+    score gained as the reward, and done flags. A game is done once it
+    has no ships left; it is then reset straight away, so the
+    observation returned for it belongs to the new game.
+
+    Stepping is batched: the ships, fleets and bullets of every game are
+    held in stacked arrays, one row per game, and each tick moves and
+    collides them all together with NumPy, the same way each game's own
+    update_game() would. Fleets are padded to the largest formation, with
+    the padding never alive. What changes more than positions and scores,
+    like the ship being hit or a fleet being cleared or reaching the
+    bottom, is rare, so it is left to the game's own code: that game is
+    brought up to date from the arrays, handles it, and is read back.
+    Between those times the games' own objects fall behind the arrays;
+    sync() brings them up to date. Rewinding and autosaving are left off.
+
+    Observations are written into arrays allocated once, and the same
+    arrays are returned every step, so copy them to keep them. With
+    pixel observations, each game draws straight into its slice of one
+    (num_envs, height, width, 4) array through pygame.image.frombuffer(),
+    so frames are never copied out of pygame.
+    """
+
+    # Actions: which way to move, and whether to fire.
+    NOOP, LEFT, RIGHT, FIRE, LEFT_FIRE, RIGHT_FIRE = range(6)
+    MOVES_LEFT = (LEFT, LEFT_FIRE)
+    MOVES_RIGHT = (RIGHT, RIGHT_FIRE)
+    FIRES = (FIRE, LEFT_FIRE, RIGHT_FIRE)
+
+    def __init__(self, num_envs, pixels=False, config_overrides=None, seed=0):
+        """
+        Create num_envs games.
+
+        Args:
+        pixels (bool): Return screen pixels instead of entity positions.
+        config_overrides (dict): Config values used by every game.
+        seed (int): Seed of the first game; the others follow on from it.
+        """
+        from core.game_logic import GameLogic, init_pygame
+
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        init_pygame()
+        config = dict(config_overrides or {})
+        # The batched step does not record rewinds or autosave.
+        config.update(rewind_seconds=0, autosave_path="")
+        # Games draw to their own surfaces, but images still need a display to convert to.
+        if pygame.display.get_surface() is None:
+            pygame.display.set_mode((1, 1))
+
+        self.num_envs = num_envs
+        self.pixels = pixels
+        # Whether each action moves left, moves right and fires, to look up for every game at once.
+        self.action_flags = np.array([(action in self.MOVES_LEFT, action in self.MOVES_RIGHT,
+                                       action in self.FIRES) for action in range(self.RIGHT_FIRE + 1)])
+        width = config.get("screen_width")
+        height = config.get("screen_height")
+        if width is None or height is None:
+            from core.settings import Settings
+            settings = Settings(config)
+            width, height = settings.screen_width, settings.screen_height
+
+        # One BGRA frame per game; each game's screen draws straight into its frame.
+        self.frames = np.zeros((num_envs, height, width, 4), dtype=np.uint8)
+        self.games = []
+        for i in range(num_envs):
+            screen = pygame.image.frombuffer(self.frames[i], (width, height), 'BGRA')
+            self.games.append(GameLogic(headless=True, config_overrides=config,
+                                        seed=seed + i, screen=screen))
+
+        # Sizes shared by every game, as they all use the same config.
+        first = self.games[0]
+        settings = first.settings
+        self.screen_width, self.screen_height = width, height
+        self.alien_width = first.fleet_manager.alien_width
+        self.alien_height = first.fleet_manager.alien_height
+        self.ship_width, self.ship_height = first.ship.rect.size
+        self.ship_top = first.ship.rect.top
+        self.bullet_width, self.bullet_height = settings.bullet_width, settings.bullet_height
+        self.fleet_drop_speed = settings.fleet_drop_speed
+        # Bullets are fired from the middle of the ship's top, as Bullet.reset() places them.
+        probe = pygame.Rect(0, 0, self.bullet_width, self.bullet_height)
+        probe.midtop = first.ship.rect.midtop
+        self.bullet_offset = probe.x - first.ship.rect.x
+        self.bullet_top = probe.y
+
+        # Fleets change size with the formation, so make room for the largest.
+        max_aliens = first.fleet_manager.max_fleet_size()
+        max_bullets = settings.bullets_allowed
+        self._allocate_state(num_envs, max_aliens, max_bullets)
+        self.observation = {
+            "ship_x": np.zeros(num_envs, dtype=np.float32),
+            "aliens": np.zeros((num_envs, max_aliens, 2), dtype=np.float32),
+            "alien_alive": np.zeros((num_envs, max_aliens), dtype=bool),
+            "bullets": np.zeros((num_envs, max_bullets, 2), dtype=np.float32),
+            "bullet_active": np.zeros((num_envs, max_bullets), dtype=bool),
+        }
+        # RGB view of the frames, in (env, y, x, channel) order.
+        self.pixel_observation = self.frames[..., 2::-1]
+        self.rewards = np.zeros(num_envs, dtype=np.float64)
+        self.dones = np.zeros(num_envs, dtype=bool)
+        self.scores = np.zeros(num_envs, dtype=np.float64)
+        for i in range(num_envs):
+            self._load(i)
+
+    def _allocate_state(self, num_envs, max_aliens, max_bullets):
+        """Allocate the stacked state of every game, a row per game."""
+        self.ticks = np.zeros(num_envs, dtype=np.int64)
+        # Whether each game is in its ship-hit pause, and the tick it ends on.
+        self.paused = np.zeros(num_envs, dtype=bool)
+        self.pause_ends = np.zeros(num_envs, dtype=np.int64)
+        self.moving_left = np.zeros(num_envs, dtype=bool)
+        self.moving_right = np.zeros(num_envs, dtype=bool)
+
+        # Speeds change with the level, so each game has its own.
+        self.ship_speeds = np.zeros(num_envs, dtype=np.float64)
+        self.bullet_speeds = np.zeros(num_envs, dtype=np.float64)
+        self.alien_speeds = np.zeros(num_envs, dtype=np.float64)
+        self.fleet_directions = np.zeros(num_envs, dtype=np.int64)
+
+        # The ship's exact position, and its rect's.
+        self.ship_x = np.zeros(num_envs, dtype=np.float64)
+        self.ship_prev_x = np.zeros(num_envs, dtype=np.float64)
+        self.ship_left = np.zeros(num_envs, dtype=np.int64)
+
+        self.alien_x = np.zeros((num_envs, max_aliens), dtype=np.float64)
+        self.alien_y = np.zeros((num_envs, max_aliens), dtype=np.float64)
+        self.alien_alive = np.zeros((num_envs, max_aliens), dtype=bool)
+        # How far each fleet has moved since it was made, and where it was last tick.
+        self.fleet_offsets = np.zeros((num_envs, 2), dtype=np.float64)
+        self.prev_fleet_offsets = np.zeros((num_envs, 2), dtype=np.float64)
+
+        # Bullets by pool slot: rect x, exact y and y last tick.
+        self.bullet_x = np.zeros((num_envs, max_bullets), dtype=np.int64)
+        self.bullet_y = np.zeros((num_envs, max_bullets), dtype=np.float64)
+        self.bullet_prev_y = np.zeros((num_envs, max_bullets), dtype=np.float64)
+        self.bullet_active = np.zeros((num_envs, max_bullets), dtype=bool)
+        # Games whose score changed since their scoreboard was last drawn.
+        self.score_changed = np.zeros(num_envs, dtype=bool)
+
+    def reset(self):
+        """Start a new game in every env and return the first observations."""
+        for i, game in enumerate(self.games):
+            self._reset_env(i, game)
+        return self._observe()
+
+    def _reset_env(self, i, game):
+        """Start a new game in env i."""
+        game._start_game()
+        self.scores[i] = game.stats.score
+        self._load(i)
+
+    def step(self, actions):
+        """
+        Apply one action per game and advance every game by a tick.
+
+        Args:
+        actions (array-like): One action (NOOP ... RIGHT_FIRE) per env.
+
+        Returns:
+        tuple: (observations, rewards, dones); the arrays are reused by the next step.
+        """
+        flags = self.action_flags[np.asarray(actions)]
+        self.moving_left[:] = flags[:, 0]
+        self.moving_right[:] = flags[:, 1]
+        # A ship can fire as long as it is not in its ship-hit pause.
+        self._fire_bullets(flags[:, 2] & ~self.paused)
+
+        # The rest of the tick is GameLogic.update_game(), for every game at once.
+        self.paused &= self.pause_ends > self.ticks
+        self.ship_prev_x[:] = self.ship_x
+        self.prev_fleet_offsets[:] = self.fleet_offsets
+        live = ~self.paused
+        self._move_ships(live)
+        self._move_bullets(live)
+        self.rewards[:] = 0.0
+        # Aliens are hit and reach edges where their rects were before moving.
+        alien_left = rect_round(self.alien_x)
+        self._collide_bullets(live, alien_left)
+        self._move_fleets(live, alien_left)
+        self.dones[:] = False
+        for i in np.flatnonzero(self._find_events(live)).tolist():
+            self._handle_events(i)
+        self.ticks += 1
+        return self._observe(), self.rewards, self.dones
+
+    def _fire_bullets(self, firing):
+        """Fire a bullet into the first free slot of each firing game that has one."""
+        free = ~self.bullet_active
+        envs = np.flatnonzero(firing & free.any(axis=1))
+        if not len(envs):
+            return
+        slots = free[envs].argmax(axis=1)
+        self.bullet_x[envs, slots] = self.ship_left[envs] + self.bullet_offset
+        self.bullet_y[envs, slots] = self.bullet_top
+        self.bullet_prev_y[envs, slots] = self.bullet_top
+        self.bullet_active[envs, slots] = True
+
+    def _move_ships(self, live):
+        """Move the ships as Ship.update() does."""
+        # Both checks use the rect from before the move.
+        right = live & self.moving_right & (self.ship_left + self.ship_width < self.screen_width)
+        left = live & self.moving_left & (self.ship_left > 0)
+        np.add(self.ship_x, self.ship_speeds, out=self.ship_x, where=right)
+        np.subtract(self.ship_x, self.ship_speeds, out=self.ship_x, where=left)
+        np.copyto(self.ship_left, rect_round(self.ship_x), casting='unsafe')
+
+    def _move_bullets(self, live):
+        """Move the bullets as BulletManager.update() does, releasing those off the top."""
+        moving = self.bullet_active & live[:, None]
+        np.copyto(self.bullet_prev_y, self.bullet_y, where=moving)
+        np.subtract(self.bullet_y, self.bullet_speeds[:, None], out=self.bullet_y, where=moving)
+        self.bullet_active &= ~(moving & (rect_round(self.bullet_y) + self.bullet_height <= 0))
+
+    def _collide_bullets(self, live, alien_left):
+        """
+        Check every game's bullets against its fleet, as BulletManager.check_collions() does.
+
+        Bullets that hit are used up and the aliens they hit are killed;
+        each game's score goes up by its alien points per alien.
+
+        Args:
+        alien_left (numpy.ndarray): Every alien's rect x.
+        """
+        envs = np.flatnonzero((self.bullet_active & live[:, None]).any(axis=1))
+        if not len(envs):
+            return
+        alien_left = alien_left[envs][:, None, :]
+        alien_top = rect_round(self.alien_y[envs])[:, None, :]
+        bullet_left = self.bullet_x[envs][:, :, None]
+        bullet_top = rect_round(self.bullet_y[envs])[:, :, None]
+        # Overlaps as (env, bullet, alien), between active bullets and living aliens.
+        overlaps = ((alien_left < bullet_left + self.bullet_width)
+                    & (alien_left + self.alien_width > bullet_left)
+                    & (alien_top < bullet_top + self.bullet_height)
+                    & (alien_top + self.alien_height > bullet_top))
+        overlaps &= self.bullet_active[envs][:, :, None] & self.alien_alive[envs][:, None, :]
+        self.bullet_active[envs] &= ~overlaps.any(axis=2)
+        killed = overlaps.any(axis=1)
+        self.alien_alive[envs] &= ~killed
+        kills = killed.sum(axis=1)
+        for i, aliens_hit in zip(envs[kills > 0].tolist(), kills[kills > 0].tolist()):
+            stats = self.games[i].stats
+            stats.score += self.games[i].settings.alien_points * aliens_hit
+            self.rewards[i] = stats.score - self.scores[i]
+            self.scores[i] = stats.score
+            self.score_changed[i] = True
+
+    def _move_fleets(self, live, alien_left):
+        """Move the fleets as FleetManager.update() does, dropping those at an edge."""
+        alive = self.alien_alive & live[:, None]
+        leftmost = alien_left.min(axis=1, where=alive, initial=np.inf)
+        rightmost = alien_left.max(axis=1, where=alive, initial=-np.inf)
+        at_edge = (leftmost <= 0) | (rightmost + self.alien_width >= self.screen_width)
+        drop = np.where(at_edge, float(self.fleet_drop_speed), 0.0)
+        self.alien_y += drop[:, None]
+        self.fleet_offsets[:, 1] += drop
+        self.fleet_directions[at_edge] *= -1
+        step = np.where(live, self.alien_speeds * self.fleet_directions, 0.0)
+        self.alien_x += step[:, None]
+        self.fleet_offsets[:, 0] += step
+
+    def _find_events(self, live):
+        """
+        Find the games whose ship was hit, or whose fleet reached the bottom or was cleared.
+
+        Returns:
+        numpy.ndarray: A flag per game.
+        """
+        alive = self.alien_alive & live[:, None]
+        alien_left = rect_round(self.alien_x)
+        alien_top = rect_round(self.alien_y)
+        ship_left = self.ship_left[:, None]
+        ship_hit = (alive & (alien_left < ship_left + self.ship_width)
+                    & (alien_left + self.alien_width > ship_left)
+                    & (alien_top < self.ship_top + self.ship_height)
+                    & (alien_top + self.alien_height > self.ship_top)).any(axis=1)
+        lowest = alien_top.max(axis=1, where=alive, initial=-np.inf)
+        at_bottom = lowest + self.alien_height >= self.screen_height
+        cleared = live & ~alive.any(axis=1)
+        return ship_hit | at_bottom | cleared
+
+    def _handle_events(self, i):
+        """Let game i handle the rest of its tick itself, resetting it if it is over."""
+        game = self.games[i]
+        self._sync(i)
+        game._check_ship_alien_collisions()
+        game._check_aliens_bottom()
+        if game.stats.ships_left <= 0 or not game.game_active:
+            self.dones[i] = True
+            self._reset_env(i, game)
+        else:
+            self._load(i)
+
+    def sync(self):
+        """Bring every game's own objects up to date with the batched state."""
+        for i in range(self.num_envs):
+            self._sync(i)
+
+    def _sync(self, i):
+        """Write env i's batched state into its game."""
+        game = self.games[i]
+        game.tick = int(self.ticks[i])
+        # As in load_state(), the ship-hit pause is the only timer.
+        game.ship_hit_paused = bool(self.paused[i])
+        game.timers.clear()
+        if game.ship_hit_paused:
+            game.timers.schedule(int(self.pause_ends[i]), game._end_ship_hit_pause)
+        game.settings.fleet_direction = int(self.fleet_directions[i])
+
+        ship = game.ship
+        ship.x, ship.prev_x = float(self.ship_x[i]), float(self.ship_prev_x[i])
+        ship.rect.x = int(self.ship_left[i])
+        ship.moving_left, ship.moving_right = bool(self.moving_left[i]), bool(self.moving_right[i])
+
+        fleet_manager = game.fleet_manager
+        size = len(fleet_manager.x)
+        np.copyto(fleet_manager.x, self.alien_x[i, :size])
+        np.copyto(fleet_manager.y, self.alien_y[i, :size])
+        fleet_manager.positions_moved = True
+        fleet_manager.offset_x, fleet_manager.offset_y = self.fleet_offsets[i].tolist()
+        fleet_manager.prev_offset_x, fleet_manager.prev_offset_y = self.prev_fleet_offsets[i].tolist()
+        fleet_manager.kill(np.flatnonzero(fleet_manager.alive & ~self.alien_alive[i, :size]))
+
+        active = self.bullet_active[i]
+        game.bullet_manager.restore(self.bullet_x[i, active].tolist(), self.bullet_y[i, active].tolist(),
+                                    self.bullet_prev_y[i, active].tolist())
+
+        if self.score_changed[i]:
+            game.sb.prep_score()
+            game.sb.check_high_score()
+            self.score_changed[i] = False
+
+    def _load(self, i):
+        """Read env i's batched state back from its game."""
+        game = self.games[i]
+        settings = game.settings
+        self.ticks[i] = game.tick
+        self.paused[i] = game.ship_hit_paused
+        self.pause_ends[i] = max((tick for tick, _, callback in game.timers.timers
+                                  if callback == game._end_ship_hit_pause), default=0)
+        self.ship_speeds[i] = settings.ship_speed
+        self.bullet_speeds[i] = settings.bullet_speed
+        self.alien_speeds[i] = settings.alien_speed
+        self.fleet_directions[i] = settings.fleet_direction
+
+        ship = game.ship
+        self.ship_x[i], self.ship_prev_x[i], self.ship_left[i] = ship.x, ship.prev_x, ship.rect.x
+
+        fleet_manager = game.fleet_manager
+        size = len(fleet_manager.x)
+        self.alien_x[i, :size] = fleet_manager.x
+        self.alien_y[i, :size] = fleet_manager.y
+        self.alien_alive[i, :size] = fleet_manager.alive
+        self.alien_alive[i, size:] = False
+        self.fleet_offsets[i] = fleet_manager.offset_x, fleet_manager.offset_y
+        self.prev_fleet_offsets[i] = fleet_manager.prev_offset_x, fleet_manager.prev_offset_y
+
+        self.bullet_active[i] = False
+        for j, bullet in enumerate(game.bullet_manager.bullets):
+            self.bullet_x[i, j] = bullet.rect.x
+            self.bullet_y[i, j] = bullet.y
+            self.bullet_prev_y[i, j] = bullet.prev_y
+            self.bullet_active[i, j] = True
+
+    def _observe(self):
+        """Write every game's state into the observation arrays."""
+        if self.pixels:
+            for i, game in enumerate(self.games):
+                self._sync(i)
+                game._draw_screen()
+            return self.pixel_observation
+
+        observation = self.observation
+        observation["ship_x"][:] = self.ship_x
+        observation["aliens"][..., 0] = self.alien_x
+        observation["aliens"][..., 1] = self.alien_y
+        observation["alien_alive"][:] = self.alien_alive
+        observation["bullets"][..., 0] = self.bullet_x
+        observation["bullets"][..., 1] = self.bullet_y
+        observation["bullet_active"][:] = self.bullet_active
+        return observation
@@ -1,33 +1,35 @@
 import pygame
-from pygame.sprite import Sprite
 
-class Bullet(Sprite):
-    """A class to manage bullets fired from the ship."""
-    
-    def __init__(self, ai_game):
-        """Create a bullet object at the ship's current position."""
-        super().__init__()
-        self.screen = ai_game.screen
-        self.settings = ai_game.settings
-        self.color = self.settings.bullet_color
+class Bullet:
+    """
+    A class to manage bullets fired from the ship.
 
-        # Create a bullet rect at (0, 0) and then set correct.
-        self.rect = pygame.Rect(0, 0, self.settings.bullet_width,
-                                self.settings.bullet_height)
-        self.rect.midtop = ai_game.ship.rect.midtop
+    Bullets are pooled by the BulletManager and reused, so they only hold
+    their own position; the screen and settings are passed in when needed.
+    """
 
+    __slots__ = ('rect', 'y', 'prev_y', 'index')
+    
+    def __init__(self, width, height):
+        """Create an inactive bullet of the given size."""
+        self.rect = pygame.Rect(0, 0, width, height)
         # Store the bullet's position as a float.
+        self.y = 0.0
+        # Position at the previous tick, for drawing between ticks.
+        self.prev_y = 0.0
+        # Position of the bullet in the manager's active list, or -1 if free.
+        self.index = -1
+
+    def reset(self, midtop):
+        """Place the bullet at the given point, ready to be fired."""
+        self.rect.midtop = midtop
         self.y = float(self.rect.y)
+        self.prev_y = self.y
 
-    def update(self):
+    def update(self, bullet_speed):
         """Move the bullet up the screen."""
         # Update the exact position of the bullet.
-        self.y -= self.settings.bullet_speed
+        self.prev_y = self.y
+        self.y -= bullet_speed
         # Update the rect position.
         self.rect.y = self.y
-
-    def draw_bullet(self):
-        """Draw the bullet to the screen."""
-        pygame.draw.rect(self.screen, self.color, self.rect)
-    
-    
\ No newline at end of file
@@ -1,39 +1,137 @@
-import pygame 
-from pygame.bullet import Bullet
+import numpy as np
+import pygame
+
+from entities.bullet import Bullet
 
 class BulletManager:
-    """A class to manage bullets fired by the ship."""
+    """
+    A class to manage bullets fired by the ship.
+
+    Every bullet is allocated up front, bullets_allowed of them, and then
+    moved between a free stack and the active list, so firing and removing
+    bullets never allocates.
+    """
 
     def __init__(self, game_logic):
-        """Initialize the bullet manager."""
+        """Initialize the bullet manager and its pool of bullets."""
         self.game_logic = game_logic
         self.settings = game_logic.settings
-        self.bullets = pygame.sprite.Group()
+        self.free = [Bullet(self.settings.bullet_width, self.settings.bullet_height)
+                     for _ in range(self.settings.bullets_allowed)]
+        # Bullets currently on screen.
+        self.bullets = []
+        # Pre-rendered bullet images, keyed by size and colour.
+        self.bullet_images = {}
+
+    def __len__(self):
+        """Return the number of bullets on screen."""
+        return len(self.bullets)
 
     def fire_bullet(self):
-        """Create a new bullet and add it to the bullets group."""
-        if len(self.bullets) < self.settings.bullets_allowed:
-            new_bullet = Bullet(self)
-            self.bullets.add(new_bullet)
+        """Take a bullet from the pool and fire it from the ship."""
+        if self.free:
+            new_bullet = self.free.pop()
+            new_bullet.reset(self.game_logic.ship.rect.midtop)
+            new_bullet.index = len(self.bullets)
+            self.bullets.append(new_bullet)
+
+    def _release(self, bullet):
+        """Return an active bullet to the pool."""
+        # Move the last active bullet into this one's slot.
+        last = self.bullets.pop()
+        if last is not bullet:
+            self.bullets[bullet.index] = last
+            last.index = bullet.index
+        bullet.index = -1
+        self.free.append(bullet)
+
+    def empty(self):
+        """Return every active bullet to the pool."""
+        for bullet in self.bullets:
+            bullet.index = -1
+        self.free.extend(self.bullets)
+        self.bullets.clear()
     
+    def restore(self, xs, ys, prev_ys):
+        """Replace the active bullets with ones at saved positions."""
+        self.empty()
+        if len(xs) > len(self.free):
+            raise ValueError(f"Saved {len(xs)} bullets, but only {len(self.free)} are allowed")
+        for x, y, prev_y in zip(xs, ys, prev_ys):
+            bullet = self.free.pop()
+            bullet.rect.x = x
+            bullet.y, bullet.prev_y = y, prev_y
+            bullet.rect.y = bullet.y
+            bullet.index = len(self.bullets)
+            self.bullets.append(bullet)
+
     def update(self):
         """Update the position of the bullets and remove old bullets."""
-        self.bullets.update()
+        bullet_speed = self.settings.bullet_speed
+        for bullet in self.bullets:
+            bullet.update(bullet_speed)
         self._remove_offscreen_bullets()
 
     def _remove_offscreen_bullets(self):
         """Remove bullets that have gone off the screen."""
-        for bullet in self.bullets.copy():
+        # Walk backwards so releasing a bullet never skips one.
+        for i in range(len(self.bullets) - 1, -1, -1):
+            bullet = self.bullets[i]
             if bullet.rect.bottom <= 0:
-                self.bullets.remove(bullet)
-
-    def check_collions(self, aliens, stats, scoreboard):
-        """Check for bullet-alien collisions and update the score."""
-        collisions = pygame.sprite.groupcollide(self.bullets, aliens, True, True)
-        if collisions:
-            for aliens_hit in collisions.values():
-                stats.score += self.settings.alien_points * len(aliens_hit)
+                self._release(bullet)
+
+    def draw(self, screen, alpha=1.0, limit=None):
+        """
+        Draw the active bullets in a single batched blit, alpha of the way from the last tick.
+
+        Args:
+        limit (int): Draw at most this many bullets; None draws them all.
+        """
+        image = self._get_bullet_image()
+        bullets = self.bullets if limit is None else self.bullets[:limit]
+        if alpha == 1.0:
+            blits = [(image, bullet.rect) for bullet in bullets]
+        else:
+            blits = [(image, (bullet.rect.x, round(bullet.prev_y + (bullet.y - bullet.prev_y) * alpha)))
+                     for bullet in bullets]
+        screen.blits(blits, doreturn=False)
+
+    def _get_bullet_image(self):
+        """Return the bullet image for the current size and colour, rendering it once."""
+        key = (self.settings.bullet_width, self.settings.bullet_height,
+               tuple(self.settings.bullet_color))
+        image = self.bullet_images.get(key)
+        if image is None:
+            image = pygame.Surface(key[:2])
+            image.fill(key[2])
+            if pygame.display.get_surface() is not None:
+                image = image.convert()
+            self.bullet_images[key] = image
+        return image
+
+    def check_collions(self, fleet, stats, scoreboard):
+        """
+        Check for bullet-alien collisions and update the score.
+
+        Every bullet is tested against the fleet as it was at the start of
+        the tick, so bullets that overlap the same alien are all used up;
+        the alien still only scores once.
+        """
+        hits = []
+        for i in range(len(self.bullets) - 1, -1, -1):
+            bullet = self.bullets[i]
+            bullet_hits = fleet.collide_rect(bullet.rect)
+            if len(bullet_hits):
+                # Both the bullet and the aliens it hit are destroyed.
+                hits.append(bullet_hits)
+                self._release(bullet)
+        if not hits:
+            return
+        alive_before = fleet.alive_count
+        fleet.kill(np.concatenate(hits))
+        aliens_hit = alive_before - fleet.alive_count
+        if aliens_hit:
+            stats.score += self.settings.alien_points * aliens_hit
             scoreboard.prep_score()
             scoreboard.check_high_score()
 
-    
\ No newline at end of file
@@ -0,0 +1,319 @@
+import math
+
+import numpy as np
+import pygame
+
+from entities.formation import FormationTemplate
+from entities.spatial_grid import SpatialGrid
+
+
+def rect_round(values):
+    """Round positions to whole pixels as pygame.Rect does, with halves away from zero."""
+    return np.trunc(values + np.copysign(0.5, values))
+
+
+def rect_round_value(value):
+    """Round one position as rect_round() does, as an int, without numpy's per-call overhead."""
+    value = float(value)
+    return math.trunc(value + math.copysign(0.5, value))
+
+
+class FleetManager:
+    """
+    A class to manage the fleet of aliens.
+
+    Rather than one Sprite per alien, the fleet is stored as arrays
+    (positions and an alive mask) so that movement, edge, drop and
+    bottom checks are done in batch, whatever the size of the fleet.
+
+    The fleet moves as one body, so collision queries go through a
+    SpatialGrid built in the fleet's own frame of reference: moving the
+    fleet only moves its offset, and only killed aliens touch the grid.
+
+    For the same reason, edge, bottom and bounding-box checks only need
+    the outermost occupied columns and rows. Living aliens are counted per
+    column and per row, and the outermost occupied ones are kept up to
+    date as aliens are killed, so those checks do not depend on fleet size.
+
+    Wherever an alien's rect used to be read, its position is rounded as
+    the rect rounded it, with rect_round(), so hits and edges fall on the
+    same pixels as they did with a Sprite per alien. Collisions read whole
+    pixel left and top arrays, rounded again only after the fleet moves.
+
+    New fleets are copied from FormationTemplates, built the first time a
+    screen size and formation is needed and shared by every game after.
+    """
+
+    # Templates keyed by alien size, screen size, ship height and formation pattern.
+    templates = {}
+    
+    def __init__(self, game_logic):
+        """Initialise the fleet manager."""
+        self.game_logic = game_logic
+        self.settings = game_logic.settings
+        self.asset_manager = game_logic.asset_manager
+        self.ship = game_logic.ship
+
+        # Every alien shares the same image, so load it and its size once.
+        self.image = self.asset_manager.load_image('assets/images/alien.bmp')
+        self.alien_width, self.alien_height = self.image.get_size()
+        # Cells match the formation spacing, so each alien sits in about one cell.
+        self.grid = SpatialGrid(2 * self.alien_width, 2 * self.alien_height)
+
+        # Fleets made so far, so a new fleet can be told from one that moved.
+        self.fleets_created = 0
+        self._allocate(0)
+
+    def _allocate(self, size):
+        """Allocate the fleet arrays for the given number of aliens."""
+        # Exact positions of each alien's top left corner.
+        self.x = np.zeros(size, dtype=np.float64)
+        self.y = np.zeros(size, dtype=np.float64)
+        # The same positions rounded as each alien's rect would have them,
+        # and whether they need rounding again since the fleet moved.
+        self.left = np.zeros(size, dtype=np.int64)
+        self.top = np.zeros(size, dtype=np.int64)
+        self.positions_moved = True
+        # Aliens that have not been shot down yet.
+        self.alive = np.zeros(size, dtype=bool)
+        self._reset()
+
+    def _reset(self):
+        """Reset everything but the fleet arrays to an empty fleet."""
+        self.alive_count = 0
+        # Aliens are stored row by row; count the living ones per column and row.
+        self.columns = self.rows = 0
+        self.column_counts = []
+        self.row_counts = []
+        # Outermost occupied columns and rows.
+        self.first_column = self.last_column = 0
+        self.first_row = self.last_row = 0
+        # How far the fleet has moved since the grid was built.
+        self.offset_x = 0.0
+        self.offset_y = 0.0
+        self.save_previous()
+        self.grid.clear()
+
+    def __len__(self):
+        """Return the number of aliens still alive."""
+        return self.alive_count
+
+    def create_fleet(self):
+        """Create a fleet of aliens, copied from the formation for the current level."""
+        template = self._get_template()
+        if len(self.x) == len(template.x):
+            # Same size as the last fleet, so reuse its arrays.
+            self._reset()
+        else:
+            self._allocate(len(template.x))
+        np.copyto(self.x, template.x)
+        np.copyto(self.y, template.y)
+        self.positions_moved = True
+        np.copyto(self.alive, template.alive)
+        self.alive_count = template.alive_count
+
+        self.columns, self.rows = template.columns, template.rows
+        self.column_counts = list(template.column_counts)
+        self.row_counts = list(template.row_counts)
+        self.first_column, self.last_column = template.first_column, template.last_column
+        self.first_row, self.last_row = template.first_row, template.last_row
+        self.grid.copy_from(template.grid)
+        self.fleets_created += 1
+
+    def restore(self, x, y, alive, offset, prev_offset):
+        """
+        Rebuild the fleet from saved positions, on the current level's formation.
+
+        Args:
+        x, y (numpy.ndarray): Saved position of every alien, dead or alive.
+        alive (numpy.ndarray): Saved alive mask.
+        offset, prev_offset (tuple): Saved fleet offsets, as (x, y).
+        """
+        self.create_fleet()
+        if len(x) != len(self.x):
+            raise ValueError(f"Saved fleet has {len(x)} aliens, but this formation has {len(self.x)}")
+        np.copyto(self.x, x)
+        np.copyto(self.y, y)
+        self.positions_moved = True
+        self.offset_x, self.offset_y = offset
+        self.prev_offset_x, self.prev_offset_y = prev_offset
+        # The grid holds aliens where the formation put them, so only the dead need removing.
+        self.kill(np.flatnonzero(self.alive & ~alive))
+
+    def _round_positions(self):
+        """Round every alien's position into left and top, if the fleet moved since they were."""
+        if self.positions_moved:
+            np.copyto(self.left, rect_round(self.x), casting='unsafe')
+            np.copyto(self.top, rect_round(self.y), casting='unsafe')
+            self.positions_moved = False
+
+    def _get_template(self):
+        """Return the formation template for the current level, building it if needed."""
+        formations = self.settings.formations
+        formation = None
+        if formations:
+            # Levels cycle through the configured formations.
+            formation = (self.game_logic.stats.level - 1) % len(formations)
+        return self._template_for(formation)
+
+    def _template_for(self, formation):
+        """Return the template for a configured formation, or the full screen if None."""
+        pattern = None if formation is None else tuple(self.settings.formations[formation])
+        # Keyed by the pattern itself, as games with different formations share the cache.
+        key = (self.alien_width, self.alien_height, self.settings.screen_width,
+               self.settings.screen_height, self.ship.rect.height, pattern)
+        template = self.templates.get(key)
+        if template is None:
+            template = self._build_template(pattern)
+            self.templates[key] = template
+        return template
+
+    def max_fleet_size(self):
+        """Return the most aliens, dead or alive, that a fleet on any level can hold."""
+        formations = self.settings.formations
+        if not formations:
+            return len(self._template_for(None).x)
+        return max(len(self._template_for(formation).x) for formation in range(len(formations)))
+
+    def _build_template(self, pattern):
+        """Build a template from a configured pattern, or fill the screen if there is none."""
+        if pattern is not None:
+            # Fleets start an alien in from the top left, with each alien an alien
+            # apart; a pattern must start clear of the right edge and of the ship.
+            max_columns = (self.settings.screen_width - 1) // (2 * self.alien_width)
+            max_rows = ((self.settings.screen_height - self.ship.rect.height - 1)
+                        // (2 * self.alien_height))
+            return FormationTemplate.from_pattern(pattern, self.alien_width, self.alien_height,
+                                                  max_columns, max_rows)
+        number_aliens_x = self._get_number_aliens_x(self.alien_width)
+        number_of_available_rows = self._get_number_rows(self.alien_height)
+        occupied = np.ones((number_of_available_rows, number_aliens_x), dtype=bool)
+        return FormationTemplate(occupied, self.alien_width, self.alien_height)
+
+    def _get_number_aliens_x(self, alien_width):
+        """Calculate the number of aliens that fit in a row."""
+        available_space_x = self.settings.screen_width - 2 * alien_width
+        return max(available_space_x // (2 * alien_width), 0)
+    
+    def _get_number_rows(self, alien_height):
+        """Calculate the number of rows of aliens that fit on the screen."""
+        available_space_y = (self.settings.screen_height - (3 * alien_height) - self.ship.rect.height)
+        return max(available_space_y // (2 * alien_height), 0)
+
+    def empty(self):
+        """Remove every alien from the fleet."""
+        self.alive[:] = False
+        self.alive_count = 0
+        self.column_counts = [0] * self.columns
+        self.row_counts = [0] * self.rows
+        self.grid.clear()
+
+    def save_previous(self):
+        """Remember the fleet's current offset, for drawing between ticks."""
+        self.prev_offset_x = self.offset_x
+        self.prev_offset_y = self.offset_y
+
+    def update(self):
+        """Check if the fleet is at an edge, then update positions"""
+        self._check_fleet_edges()
+        step = self.settings.alien_speed * self.settings.fleet_direction
+        self.x += step
+        self.offset_x += step
+        self.positions_moved = True
+
+    def _check_fleet_edges(self):
+        """Respond appropriately if any aliens have reached an edge"""
+        if not self.alive_count:
+            return
+        # Every alien in a column shares its x, so the first row's alien stands in for it.
+        if (rect_round_value(self.x[self.first_column]) <= 0 or
+                rect_round_value(self.x[self.last_column]) + self.alien_width
+                >= self.settings.screen_width):
+            self._change_fleet_direction()
+
+    def _change_fleet_direction(self):
+        """Drop the enitre fleet and change the fleet's direction."""
+        self.y += self.settings.fleet_drop_speed
+        self.offset_y += self.settings.fleet_drop_speed
+        self.positions_moved = True
+        self.settings.fleet_direction *= -1
+
+    def reached_bottom(self):
+        """Return True if any alien has reached the bottom of the screen."""
+        if not self.alive_count:
+            return False
+        # Every alien in a row shares its y, so the row's first alien stands in for it.
+        bottom = rect_round_value(self.y[self.last_row * self.columns]) + self.alien_height
+        return bottom >= self.settings.screen_height
+
+    def bounding_rect(self):
+        """Return a rect enclosing every living alien; it is empty if none are left."""
+        if not self.alive_count:
+            return pygame.Rect(0, 0, 0, 0)
+        left = rect_round_value(self.x[self.first_column])
+        top = rect_round_value(self.y[self.first_row * self.columns])
+        right = rect_round_value(self.x[self.last_column]) + self.alien_width
+        bottom = rect_round_value(self.y[self.last_row * self.columns]) + self.alien_height
+        return pygame.Rect(left, top, right - left, bottom - top)
+
+    def collide_rect(self, rect):
+        """
+        Find the living aliens that overlap the given rect.
+
+        Returns:
+        numpy.ndarray: Indices of the aliens that overlap rect.
+        """
+        return self._collide_area(rect.left, rect.top, rect.right, rect.bottom)
+
+    def _collide_area(self, left, top, right, bottom):
+        """Find the living aliens overlapping [left, right) x [top, bottom)."""
+        # Broadphase: translate the area into the grid's frame, widened by a
+        # pixel to allow for rounding, and collect the aliens in those cells.
+        candidates = self.grid.query(left - self.offset_x - 1, top - self.offset_y - 1,
+                                     right - self.offset_x + 1, bottom - self.offset_y + 1)
+        if not candidates:
+            return np.empty(0, dtype=np.int64)
+
+        # Narrowphase: exact rect overlap on the candidates only.
+        self._round_positions()
+        indices = np.fromiter(sorted(candidates), dtype=np.int64, count=len(candidates))
+        alien_left = self.left[indices]
+        alien_top = self.top[indices]
+        overlapping = ((alien_left < right) & (alien_left + self.alien_width > left)
+                       & (alien_top < bottom) & (alien_top + self.alien_height > top))
+        return indices[overlapping]
+
+    def kill(self, indices):
+        """Remove the aliens at the given indices from the fleet."""
+        for index in indices.tolist():
+            if self.alive[index]:
+                self.alive[index] = False
+                self.alive_count -= 1
+                self.grid.remove(index)
+                row, column = divmod(index, self.columns)
+                self.column_counts[column] -= 1
+                self.row_counts[row] -= 1
+        if self.alive_count:
+            self._shrink_bounds()
+
+    def _shrink_bounds(self):
+        """Move the outermost columns and rows in past any that are now empty."""
+        # Each column and row is stepped past at most once per fleet.
+        while not self.column_counts[self.first_column]:
+            self.first_column += 1
+        while not self.column_counts[self.last_column]:
+            self.last_column -= 1
+        while not self.row_counts[self.first_row]:
+            self.first_row += 1
+        while not self.row_counts[self.last_row]:
+            self.last_row -= 1
+
+    def draw(self, screen, alpha=1.0):
+        """Draw every living alien in a single call, alpha of the way from the last tick."""
+        image = self.image
+        # The fleet moves as one, so shift every alien back by the same amount.
+        shift_x = (self.offset_x - self.prev_offset_x) * (alpha - 1)
+        shift_y = (self.offset_y - self.prev_offset_y) * (alpha - 1)
+        positions = zip(rect_round(self.x[self.alive] + shift_x).tolist(),
+                        rect_round(self.y[self.alive] + shift_y).tolist())
+        screen.blits([(image, position) for position in positions], doreturn=False)
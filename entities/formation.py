@@ -0,0 +1,71 @@
+import numpy as np
+
+from entities.spatial_grid import SpatialGrid
+
+
+class FormationTemplate:
+    """
+    A class to hold a precomputed fleet layout.
+
+    Templates are built once per screen size and formation, and every new
+    fleet is a copy of one: its positions, alive mask, occupancy counts
+    and a ready-filled spatial grid.
+    """
+
+    def __init__(self, occupied, alien_width, alien_height):
+        """
+        Lay out a fleet from a grid of occupied slots.
+
+        Args:
+        occupied (numpy.ndarray): (rows, columns) bools; True where an alien starts.
+        """
+        self.rows, self.columns = occupied.shape
+        columns = np.arange(self.columns)
+        rows = np.arange(self.rows)
+        # Aliens are stored row by row, spaced one alien apart.
+        self.x = np.tile(alien_width + columns * 2 * alien_width, self.rows).astype(np.float64)
+        self.y = np.repeat(alien_height + rows * 2 * alien_height, self.columns).astype(np.float64)
+        self.alive = occupied.ravel().copy()
+        self.alive_count = int(self.alive.sum())
+
+        self.column_counts = occupied.sum(axis=0).tolist()
+        self.row_counts = occupied.sum(axis=1).tolist()
+        # Outermost occupied columns and rows.
+        occupied_columns = np.flatnonzero(self.column_counts)
+        occupied_rows = np.flatnonzero(self.row_counts)
+        self.first_column, self.last_column = self._bounds(occupied_columns)
+        self.first_row, self.last_row = self._bounds(occupied_rows)
+
+        self.grid = SpatialGrid(2 * alien_width, 2 * alien_height)
+        for index in np.flatnonzero(self.alive).tolist():
+            self.grid.insert(index, int(self.x[index]), int(self.y[index]),
+                             alien_width, alien_height)
+
+    def _bounds(self, occupied):
+        """Return the first and last of the occupied indices, or (0, -1) if there are none."""
+        if not len(occupied):
+            return 0, -1
+        return int(occupied[0]), int(occupied[-1])
+
+    @classmethod
+    def from_pattern(cls, pattern, alien_width, alien_height, max_columns=None, max_rows=None):
+        """
+        Build a template from rows of text, where 'X' marks an alien and any other character a gap.
+
+        Args:
+        pattern (list): One string per row of the formation.
+        max_columns, max_rows (int): Most columns and rows that fit on the
+            screen; a larger pattern raises ValueError.
+        """
+        columns = max((len(row) for row in pattern), default=0)
+        if max_columns is not None and columns > max_columns:
+            raise ValueError(f"Formation {pattern} is {columns} aliens wide, "
+                             f"but only {max_columns} fit across the screen")
+        if max_rows is not None and len(pattern) > max_rows:
+            raise ValueError(f"Formation {pattern} is {len(pattern)} rows high, "
+                             f"but only {max_rows} fit above the ship")
+        occupied = np.zeros((len(pattern), columns), dtype=bool)
+        for row_number, row in enumerate(pattern):
+            for column_number, slot in enumerate(row):
+                occupied[row_number, column_number] = slot == 'X'
+        return cls(occupied, alien_width, alien_height)
@@ -1,5 +1,6 @@
+import math
+
 from pygame.sprite import Sprite
-from assets.utils import AssetManager
 
 
 class Ship(Sprite):
@@ -21,6 +22,8 @@ class Ship(Sprite):
 
         # Store a float for the ship's exact horizontal position. 
         self.x = float(self.rect.x)
+        # Position at the previous tick, for drawing between ticks.
+        self.prev_x = self.x
 
         # Movement flag; start with a ship that's not moving.
         self.moving_right = False
@@ -36,13 +39,19 @@ class Ship(Sprite):
         # Update rect object from self.x.
         self.rect.x = self.x
 
-    def blitme(self):
-        """Draw the ship at its current location."""
-        self.screen.blit(self.image, self.rect)
+    def blitme(self, alpha=1.0):
+        """Draw the ship at its current location, or alpha of the way from its last one."""
+        if alpha == 1.0:
+            self.screen.blit(self.image, self.rect)
+            return
+        x = self.prev_x + (self.x - self.prev_x) * alpha
+        # Round halves up like the rect does, not to even like round().
+        self.screen.blit(self.image, (math.floor(x + 0.5), self.rect.y))
 
     def center_ship(self):
         """Center the ship on the screen."""
         self.rect.midbottom = self.screen_rect.midbottom
         self.x = float(self.rect.x)
+        self.prev_x = self.x
 
 
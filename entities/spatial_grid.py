@@ -0,0 +1,94 @@
+import math
+
+
+class SpatialGrid:
+    """
+    A uniform grid that buckets rects by the cells they cover.
+
+    Used as a broadphase: a query only returns the keys stored in the
+    cells a rect touches, so only those need an exact overlap test.
+    """
+
+    def __init__(self, cell_width, cell_height):
+        """Initialise an empty grid with the given cell size."""
+        self.cell_width = max(int(cell_width), 1)
+        self.cell_height = max(int(cell_height), 1)
+        self.clear()
+
+    def clear(self):
+        """Remove every key from the grid."""
+        # Maps (column, row) to the set of keys in that cell.
+        self.cells = {}
+        # Maps each key to the cells it was inserted into.
+        self.entries = {}
+        # Range of cells that have ever been used, to clamp large queries.
+        self.min_col = self.min_row = None
+        self.max_col = self.max_row = None
+
+    def copy_from(self, other):
+        """Make this grid hold the same keys in the same cells as other."""
+        self.cells = {cell: set(bucket) for cell, bucket in other.cells.items()}
+        # The cell lists are never changed in place, so they can be shared.
+        self.entries = dict(other.entries)
+        self.min_col, self.max_col = other.min_col, other.max_col
+        self.min_row, self.max_row = other.min_row, other.max_row
+
+    def __len__(self):
+        """Return the number of keys in the grid."""
+        return len(self.entries)
+
+    def _cell_keys(self, left, top, right, bottom):
+        """Return the used cells covered by the area [left, right) x [top, bottom)."""
+        # Cells outside the used range are always empty, so clamp the area
+        # to it first; this also lets callers pass infinite bounds.
+        left = max(left, self.min_col * self.cell_width)
+        right = min(right, (self.max_col + 1) * self.cell_width)
+        top = max(top, self.min_row * self.cell_height)
+        bottom = min(bottom, (self.max_row + 1) * self.cell_height)
+        first_col, last_col = int(left // self.cell_width), int(math.ceil(right / self.cell_width)) - 1
+        first_row, last_row = int(top // self.cell_height), int(math.ceil(bottom / self.cell_height)) - 1
+        return [(col, row)
+                for row in range(first_row, last_row + 1)
+                for col in range(first_col, last_col + 1)]
+
+    def insert(self, key, left, top, width, height):
+        """Add key to every cell covered by the given rect."""
+        first_col, last_col = left // self.cell_width, (left + width - 1) // self.cell_width
+        first_row, last_row = top // self.cell_height, (top + height - 1) // self.cell_height
+        cells = [(col, row)
+                 for row in range(first_row, last_row + 1)
+                 for col in range(first_col, last_col + 1)]
+        for cell in cells:
+            self.cells.setdefault(cell, set()).add(key)
+        self.entries[key] = cells
+
+        if self.min_col is None:
+            self.min_col, self.max_col = first_col, last_col
+            self.min_row, self.max_row = first_row, last_row
+        else:
+            self.min_col, self.max_col = min(self.min_col, first_col), max(self.max_col, last_col)
+            self.min_row, self.max_row = min(self.min_row, first_row), max(self.max_row, last_row)
+
+    def remove(self, key):
+        """Remove key from the grid, if present."""
+        for cell in self.entries.pop(key, ()):
+            bucket = self.cells[cell]
+            bucket.discard(key)
+            if not bucket:
+                del self.cells[cell]
+
+    def move(self, key, left, top, width, height):
+        """Update the cells of a key that has moved."""
+        self.remove(key)
+        self.insert(key, left, top, width, height)
+
+    def query(self, left, top, right, bottom):
+        """Return the set of keys in the cells covered by [left, right) x [top, bottom)."""
+        found = set()
+        if not self.cells or right <= left or bottom <= top:
+            return found
+        for cell in self._cell_keys(left, top, right, bottom):
+            bucket = self.cells.get(cell)
+            if bucket:
+                found |= bucket
+        return found
@@ -1,7 +1,90 @@
+from time import perf_counter
+
+# Taken before the game's imports, which are much of the startup time.
+LAUNCHED_AT = perf_counter()
+
+import argparse
+
 from core.game_loop import GameLoop
+from core.game_logic import GameLogic
 
 
 if __name__ == '__main__':
-    # Make a game instance, and run the game. 
-    game = GameLoop()
-    game.run_game()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Alien Invasion")
+    parser.add_argument("--headless", type=int, metavar="TICKS",
+                        help="Simulate TICKS ticks without a window and report ticks/sec.")
+    parser.add_argument("--record", metavar="FILE",
+                        help="Record every input to FILE, saved on quitting.")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="Replay a recorded session headless and check its outcome.")
+    parser.add_argument("--render", action="store_true",
+                        help="Draw the replay in a window at normal speed.")
+    parser.add_argument("--bullet-stress", type=int, metavar="BULLETS",
+                        help="Render BULLETS projectiles without a window and report frames/sec.")
+    parser.add_argument("--serve", metavar="HOST:PORT",
+                        help="Run the game headless as a server for networked clients.")
+    parser.add_argument("--connect", metavar="HOST:PORT",
+                        help="Play a game run by a server.")
+    parser.add_argument("--spectate", metavar="HOST:PORT",
+                        help="Watch a game run by a server.")
+    parser.add_argument("--resume", metavar="FILE",
+                        help="Carry on from a game saved by autosave.")
+    parser.add_argument("--player", metavar="NAME",
+                        help="Save sessions under NAME rather than player_name in the config.")
+    parser.add_argument("--memory-stats", action="store_true",
+                        help="Track allocations per frame and GC pauses, and report them at the end.")
+    parser.add_argument("--startup-time", action="store_true",
+                        help="Report the time from launch to the first frame on screen.")
+    args = parser.parse_args()
+
+    if args.replay:
+        from core.replay import InputLog, replay, matches_outcome
+
+        log = InputLog.load(args.replay)
+        game = replay(log, headless=not args.render)
+        print(f"Replayed {game.tick} ticks: score {game.stats.score}, level {game.stats.level}, "
+              f"{'matches' if matches_outcome(log, game) else 'DOES NOT MATCH'} the recording")
+    elif args.bullet_stress:
+        from core.bullet_stress import run_bullet_stress
+
+        fps = run_bullet_stress(args.bullet_stress)
+        print(f"{args.bullet_stress} bullets at {fps:,.0f} frames/sec")
+    elif args.serve:
+        import asyncio
+        from net.server import serve
+
+        host, port = args.serve.rsplit(":", 1)
+        asyncio.run(serve(host, int(port)))
+    elif args.connect or args.spectate:
+        import asyncio
+        from net import protocol
+        from net.client import follow
+
+        host, port = (args.connect or args.spectate).rsplit(":", 1)
+        role = protocol.PLAYER if args.connect else protocol.SPECTATOR
+        stats = asyncio.run(follow(host, int(port), role))
+        print(f"Received {stats['bytes_received']:,} bytes in {stats['snapshots']} snapshots, "
+              f"{stats['bytes_per_second']:,.0f} B/s; round trip {stats['rtt_ms']} ms")
+    elif args.headless:
+        # Fast-forward the simulation as quickly as the CPU allows.
+        game = GameLogic(headless=True)
+        if args.memory_stats:
+            game.memory_profiler.start()
+        game._start_game()
+        tps = game.step(args.headless)
+        print(f"{args.headless} ticks at {tps:,.0f} ticks/sec")
+        if args.memory_stats:
+            print(game.memory_profiler.format_summary())
+    else:
+        # Make a game instance, and run the game. 
+        game = GameLoop(LAUNCHED_AT if args.startup_time else None)
+        # Resume first, so a recording starts from the resumed game.
+        if args.resume:
+            game.game.resume(args.resume)
+        if args.record:
+            game.game.start_recording(args.record)
+        if args.player:
+            game.game.player_name = args.player
+        if args.memory_stats:
+            game.game.memory_profiler.start()
+        game.run_game()
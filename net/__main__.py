@@ -0,0 +1,88 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+
+import pygame
+
+from core.game_logic import GameLogic
+from core.replay import InputLog
+from net import protocol
+from net.client import GameClient
+from net.server import GameServer
+
+
+async def play(client, seconds):
+    """Click Play, then fire every few ticks, like a player who never moves."""
+    click = pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1,
+                               pos=(client.settings.screen_width // 2,
+                                    client.settings.screen_height // 2))
+    client.send_input(InputLog.MOUSEBUTTONDOWN, click)
+    fire = pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE)
+    for _ in range(int(seconds * 10)):
+        client.send_input(InputLog.KEYDOWN, fire)
+        await asyncio.sleep(0.1)
+
+
+async def run_loopback(spectators, seconds):
+    """
+    Run a server, one scripted player and some spectators over loopback.
+
+    Returns:
+    tuple: The server's stats and each client's stats.
+    """
+    server = GameServer(GameLogic(headless=True))
+    port = await server.start()
+    clients = [GameClient(protocol.PLAYER)]
+    clients += [GameClient(protocol.SPECTATOR) for _ in range(spectators)]
+    for client in clients:
+        await client.connect("127.0.0.1", port)
+
+    server_task = asyncio.create_task(server.run(seconds))
+    # Clients follow the game until the server closes their connections.
+    client_tasks = [asyncio.create_task(client.run()) for client in clients]
+    await play(clients[0], seconds)
+    await server_task
+    server_stats = server.stats()
+    server_stats["score"] = server.game.stats.score
+    server.stop()
+    await asyncio.gather(*client_tasks)
+    return server_stats, [client.stats_summary() for client in clients]
+
+
+def format_loopback(server_stats, client_stats):
+    """Return the loopback results as readable text."""
+    lines = [f"Server: {server_stats['ticks']} ticks at {server_stats['ticks_per_second']:.1f}/s, "
+             f"encoding and sending {server_stats['encode_ms']:.3f} ms per tick for "
+             f"{len(server_stats['clients'])} clients; score {server_stats['score']:,}"]
+    sent = server_stats["clients"].values()
+    lines.append(f"  sent per client: {sum(c['bytes_per_second'] for c in sent) / max(len(sent), 1):,.0f} B/s, "
+                 f"{sum(c['keyframes_sent'] for c in sent)} keyframes, "
+                 f"{sum(c['snapshots_skipped'] for c in sent)} snapshots skipped")
+    for name, stats in (("player", client_stats[0]),
+                        ("spectators", client_stats[1:])):
+        stats = stats if isinstance(stats, list) else [stats]
+        if not stats:
+            continue
+        trips = [trip for s in stats for trip in s["rtt_samples_ms"]]
+        lines.append(f"  {name}: {sum(s['snapshots_per_second'] for s in stats) / len(stats):.1f} snapshots/s, "
+                     f"{sum(s['bytes_per_second'] for s in stats) / len(stats):,.0f} B/s each, "
+                     f"median RTT {statistics.median(trips) if trips else float('nan'):.2f} ms")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a networked game over loopback and report its counters.")
+    parser.add_argument("--spectators", type=int, default=24, help="Number of spectator clients.")
+    parser.add_argument("--seconds", type=float, default=5.0, help="How long to run for.")
+    args = parser.parse_args()
+
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    server_stats, client_stats = asyncio.run(run_loopback(args.spectators, args.seconds))
+    print(format_loopback(server_stats, client_stats))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
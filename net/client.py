@@ -0,0 +1,266 @@
+import asyncio
+import json
+
+import numpy as np
+import pygame
+
+from core.game_stats import GameStats
+from core.replay import InputLog
+from core.settings import Settings
+from net import protocol
+
+
+class GameClient:
+    """
+    A class to follow a game run by a GameServer.
+
+    The client keeps the last two snapshots it received and, when drawing,
+    interpolates between them by how far it is through the tick since the
+    latest one arrived, so the game moves smoothly at any frame rate.
+    Players send their key presses and clicks to the server; spectators
+    only watch. Without render the client only decodes snapshots, which
+    is how the loopback test runs many of them in one process.
+    """
+
+    def __init__(self, role=protocol.SPECTATOR, render=False, ping_interval=0.5):
+        """Initialise an unconnected client."""
+        self.role = role
+        self.render = render
+        self.ping_interval = ping_interval
+        self.reader = self.writer = None
+        self.client_id = None
+        self.settings = None
+        self.tick_rate = 60
+        self.running = False
+        # The latest state, the one before it for interpolation, and when the latest arrived.
+        self.state = None
+        self.previous = None
+        self.arrived_at = 0.0
+        # Counters.
+        self.bytes_received = 0
+        self.snapshots = 0
+        self.keyframes = 0
+        self.round_trips = []
+        self.connected_at = None
+
+    async def connect(self, host, port):
+        """Connect to a server and wait for its welcome."""
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        self.connected_at = asyncio.get_running_loop().time()
+        message_type, payload = await self._read()
+        if message_type != protocol.WELCOME:
+            raise ConnectionError(f"Expected a welcome from the server, got message {message_type}")
+        self.client_id, self.tick_rate = protocol.WELCOME_BODY.unpack_from(payload)
+        self.settings = Settings(json.loads(payload[protocol.WELCOME_BODY.size:]))
+        self.bullet_slots = self.settings.bullets_allowed
+        self._send(protocol.HELLO, protocol.HELLO_BODY.pack(self.role))
+        if self.render:
+            self._init_view()
+
+    def _init_view(self):
+        """Open a window and create what is needed to draw the game."""
+        from assets.utils import get_asset_manager
+        from core.game_logic import init_pygame
+        from ui.button import Button
+        from ui.scoreboard import Scoreboard
+        from ui.text_cache import TextCache
+
+        init_pygame()
+        self.screen = pygame.display.set_mode((self.settings.screen_width,
+                                               self.settings.screen_height))
+        pygame.display.set_caption("Alien Invasion")
+        self.asset_manager = get_asset_manager()
+        self.text_cache = TextCache()
+        self.alien_image = self.asset_manager.load_image('assets/images/alien.bmp')
+        self.ship_image = self.asset_manager.load_image('assets/images/ship.bmp')
+        self.ship_y = self.settings.screen_height - self.ship_image.get_height()
+        # The scoreboard and button only need the parts of a game this client has.
+        self.stats = GameStats(self)
+        self.sb = Scoreboard(self)
+        self.play_button = Button(self, "Play")
+
+    async def run(self, seconds=None):
+        """Follow the game until the server goes away, the window is closed, or for the given seconds."""
+        self.running = True
+        tasks = [asyncio.create_task(self._receive()), asyncio.create_task(self._ping())]
+        if self.render:
+            tasks.append(asyncio.create_task(self._draw_frames()))
+        try:
+            await asyncio.wait(tasks, timeout=seconds, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            self.running = False
+            for task in tasks:
+                task.cancel()
+            self.writer.close()
+
+    async def _read(self):
+        """Read one message, counting its bytes."""
+        message_type, payload = await protocol.read_frame(self.reader)
+        self.bytes_received += protocol.FRAME.size + len(payload)
+        return message_type, payload
+
+    def _send(self, message_type, payload=b""):
+        """Send one message to the server."""
+        self.writer.write(protocol.frame(message_type, payload))
+
+    async def _receive(self):
+        """Apply snapshots and time pongs as they arrive."""
+        loop = asyncio.get_running_loop()
+        try:
+            while self.running:
+                message_type, payload = await self._read()
+                if message_type == protocol.SNAPSHOT:
+                    self._apply(payload, loop.time())
+                elif message_type == protocol.PONG:
+                    (sent,) = protocol.PING_BODY.unpack(payload)
+                    self.round_trips.append(loop.time() - sent)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    def _apply(self, payload, now):
+        """Apply a snapshot, keeping the state it replaces for interpolation."""
+        # Snapshots update the state in place, so keep a copy of it.
+        previous = self.state.copy() if self.state is not None else None
+        self.state = protocol.apply_snapshot(self.state, payload, self.bullet_slots)
+        keyframe = protocol.SNAPSHOT_HEADER.unpack_from(payload)[1] & protocol.KEYFRAME
+        self.previous = None if keyframe else previous
+        self.arrived_at = now
+        self.snapshots += 1
+        if keyframe:
+            self.keyframes += 1
+
+    async def _ping(self):
+        """Ping the server now and then to measure the round trip."""
+        loop = asyncio.get_running_loop()
+        while self.running:
+            self._send(protocol.PING, protocol.PING_BODY.pack(loop.time()))
+            await asyncio.sleep(self.ping_interval)
+
+    def send_input(self, kind, event):
+        """Send a key press, key release or click to the server."""
+        if kind == InputLog.MOUSEBUTTONDOWN:
+            x, y = event.pos
+            body = protocol.INPUT_BODY.pack(kind, event.button, x, y)
+        else:
+            body = protocol.INPUT_BODY.pack(kind, event.key, 0, 0)
+        self._send(protocol.INPUT, body)
+
+    def alpha(self, now):
+        """How far, from 0 to 1, to draw between the previous snapshot and the latest."""
+        return min((now - self.arrived_at) * self.tick_rate, 1.0)
+
+    def positions(self, alpha):
+        """
+        Return where to draw everything, alpha of the way from the previous snapshot.
+
+        Returns:
+        tuple: Ship x, then lists of alien and bullet (x, y) positions, in pixels.
+        """
+        state, previous = self.state, self.previous
+        # Jumps, like a new fleet or a freshly fired bullet, are not smoothed.
+        if previous is not None and previous.fleet != state.fleet:
+            previous = None
+        ship_x = state.ship_x
+        offset_x, offset_y = state.offset_x, state.offset_y
+        bullet_y = state.bullet_y.astype(np.float64)
+        if previous is not None:
+            ship_x = previous.ship_x + (state.ship_x - previous.ship_x) * alpha
+            offset_x = previous.offset_x + (state.offset_x - previous.offset_x) * alpha
+            offset_y = previous.offset_y + (state.offset_y - previous.offset_y) * alpha
+            moving = ((previous.bullet_active & state.bullet_active).astype(bool) &
+                      (previous.bullet_x == state.bullet_x))
+            bullet_y[moving] = previous.bullet_y[moving] + (bullet_y[moving] - previous.bullet_y[moving]) * alpha
+
+        alive = state.alien_alive.astype(bool)
+        aliens = zip(((state.alien_x[alive] + offset_x) / protocol.QUANT).tolist(),
+                     ((state.alien_y[alive] + offset_y) / protocol.QUANT).tolist())
+        active = state.bullet_active.astype(bool)
+        bullets = zip((state.bullet_x[active] / protocol.QUANT).tolist(),
+                      (bullet_y[active] / protocol.QUANT).tolist())
+        return ship_x / protocol.QUANT, list(aliens), list(bullets)
+
+    async def _draw_frames(self):
+        """Handle window events and draw at the frame rate."""
+        loop = asyncio.get_running_loop()
+        frame_seconds = 1 / self.settings.frame_rate
+        while self.running:
+            started = loop.time()
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_q):
+                    return
+                if self.role != protocol.PLAYER:
+                    continue
+                if event.type == pygame.KEYDOWN:
+                    self.send_input(InputLog.KEYDOWN, event)
+                elif event.type == pygame.KEYUP:
+                    self.send_input(InputLog.KEYUP, event)
+                elif event.type == pygame.MOUSEBUTTONDOWN:
+                    self.send_input(InputLog.MOUSEBUTTONDOWN, event)
+            if self.state is not None:
+                self._draw(self.alpha(loop.time()))
+                pygame.display.flip()
+            await asyncio.sleep(max(0.0, frame_seconds - (loop.time() - started)))
+
+    def _draw(self, alpha):
+        """Draw the game, alpha of the way from the previous snapshot to the latest."""
+        self._update_scoreboard()
+        ship_x, aliens, bullets = self.positions(alpha)
+        self.screen.fill(self.settings.bg_color)
+        bullet_size = (self.settings.bullet_width, self.settings.bullet_height)
+        for x, y in bullets:
+            self.screen.fill(self.settings.bullet_color, ((round(x), round(y)), bullet_size))
+        self.screen.blit(self.ship_image, (round(ship_x), self.ship_y))
+        self.screen.blits([(self.alien_image, position) for position in aliens], doreturn=False)
+        self.sb.show_score()
+        if not self.state.flags & protocol.GAME_ACTIVE:
+            self.play_button.draw_button()
+
+    def _update_scoreboard(self):
+        """Re-render the scoreboard images whose values changed."""
+        state, stats = self.state, self.stats
+        if stats.score != state.score:
+            stats.score = state.score
+            self.sb.prep_score()
+        if stats.high_score != state.high_score:
+            stats.high_score = state.high_score
+            self.sb.prep_high_score()
+        if stats.level != state.level:
+            stats.level = state.level
+            self.sb.prep_level()
+        if stats.ships_left != state.ships_left:
+            stats.ships_left = state.ships_left
+            self.sb.prep_ships()
+
+    def stats_summary(self):
+        """
+        Return the client's counters.
+
+        Returns:
+        dict: Bytes and snapshots received and their rates, keyframes, and
+            round trip times in milliseconds: the median and longest, and
+            every sample.
+        """
+        elapsed = asyncio.get_running_loop().time() - self.connected_at if self.connected_at else 0.0
+        trips = np.array(self.round_trips) * 1000
+        return {
+            "bytes_received": self.bytes_received,
+            "bytes_per_second": self.bytes_received / elapsed if elapsed else 0.0,
+            "snapshots": self.snapshots,
+            "snapshots_per_second": self.snapshots / elapsed if elapsed else 0.0,
+            "keyframes": self.keyframes,
+            "rtt_ms": (float(np.median(trips)), float(trips.max())) if len(trips) else None,
+            "rtt_samples_ms": trips.tolist(),
+        }
+
+
+async def follow(host, port, role=protocol.SPECTATOR):
+    """
+    Open a window on a server's game until it is closed.
+
+    Returns:
+    dict: The client's counters.
+    """
+    client = GameClient(role, render=True)
+    await client.connect(host, port)
+    await client.run()
+    return client.stats_summary()
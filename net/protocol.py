@@ -0,0 +1,206 @@
+import struct
+
+import numpy as np
+
+
+# Every message is a frame header followed by its payload.
+FRAME = struct.Struct("<IB")  # payload length, message type
+
+# Client to server.
+HELLO, INPUT, PING = 1, 2, 3
+# Server to client.
+PONG, WELCOME, SNAPSHOT = 4, 5, 6
+
+# HELLO: the role the client joins as.
+HELLO_BODY = struct.Struct("<B")
+PLAYER, SPECTATOR = 0, 1
+# INPUT: kind, key or button, x, y; kinds are those of core.replay.InputLog.
+INPUT_BODY = struct.Struct("<BIhh")
+# PING and PONG: the client's clock when it sent the ping, echoed back.
+PING_BODY = struct.Struct("<d")
+# WELCOME: client id and tick rate, followed by the server's config as JSON.
+WELCOME_BODY = struct.Struct("<HH")
+
+# SNAPSHOT: tick, flags, score, high score, level, ships left, ship x,
+# fleet number (wrapping), fleet offset x and y, fleet size, then the
+# number of alien and bullet changes that follow.
+SNAPSHOT_HEADER = struct.Struct("<IBQQIhhHiiHHH")
+GAME_ACTIVE, SHIP_HIT_PAUSED, KEYFRAME = 1, 2, 4
+# One changed alien: positions are relative to the fleet offset.
+ALIEN_CHANGE = np.dtype([("index", "<u2"), ("alive", "u1"), ("x", "<i2"), ("y", "<i2")])
+# One changed bullet slot: positions are on screen.
+BULLET_CHANGE = np.dtype([("slot", "<u2"), ("active", "u1"), ("x", "<i2"), ("y", "<i2")])
+
+# Positions are sent as whole numbers of 1/QUANT pixels; in 16 bits that
+# covers 4095 pixels either way, and quantize() clips anything further.
+QUANT = 8
+
+
+def frame(message_type, payload=b""):
+    """Return a message ready to send."""
+    return FRAME.pack(len(payload), message_type) + payload
+
+
+async def read_frame(reader):
+    """
+    Read one message from an asyncio stream.
+
+    Returns:
+    tuple: (message type, payload bytes).
+    """
+    length, message_type = FRAME.unpack(await reader.readexactly(FRAME.size))
+    payload = await reader.readexactly(length) if length else b""
+    return message_type, payload
+
+
+def quantize(values):
+    """Turn pixel positions into the fixed-point values sent over the wire."""
+    return np.clip(np.rint(np.asarray(values) * QUANT), -32768, 32767).astype(np.int16)
+
+
+class StateFrame:
+    """A class to hold one tick of game state, quantized as it is sent."""
+
+    def __init__(self, alien_count, bullet_slots):
+        """Initialise an empty frame for the given fleet size and bullet pool."""
+        self.tick = 0
+        self.flags = 0
+        self.score = self.high_score = 0
+        self.level = 1
+        self.ships_left = 0
+        self.ship_x = 0
+        self.fleet = 0
+        self.offset_x = self.offset_y = 0
+        self.alien_alive = np.zeros(alien_count, dtype=np.uint8)
+        self.alien_x = np.zeros(alien_count, dtype=np.int16)
+        self.alien_y = np.zeros(alien_count, dtype=np.int16)
+        self.bullet_active = np.zeros(bullet_slots, dtype=np.uint8)
+        self.bullet_x = np.zeros(bullet_slots, dtype=np.int16)
+        self.bullet_y = np.zeros(bullet_slots, dtype=np.int16)
+
+    def copy(self):
+        """Return a copy that later snapshots applied to this frame will not change."""
+        frame_copy = StateFrame(0, 0)
+        for name, value in vars(self).items():
+            setattr(frame_copy, name, value.copy() if isinstance(value, np.ndarray) else value)
+        return frame_copy
+
+
+class SnapshotEncoder:
+    """
+    A class to turn the server's game into snapshot messages.
+
+    capture() quantizes the game once per tick. Aliens are stored relative
+    to the fleet offset, so the fleet moving only changes the offset, and
+    bullets are stored by their slot in the bullet pool. encode() then
+    writes only the aliens and bullets that differ from a previous frame,
+    or every one of them for a keyframe.
+    """
+
+    def __init__(self, game):
+        """Initialise the encoder for a game."""
+        self.game = game
+        pool = game.bullet_manager.free + game.bullet_manager.bullets
+        # Each pooled bullet keeps the same slot for the whole session.
+        self.bullet_slots = {bullet: slot for slot, bullet in enumerate(pool)}
+
+    def capture(self):
+        """Return the game's current state as a StateFrame."""
+        game = self.game
+        fleet, stats = game.fleet_manager, game.stats
+        state = StateFrame(len(fleet.x), len(self.bullet_slots))
+        state.tick = game.tick
+        state.flags = ((GAME_ACTIVE if game.game_active else 0) |
+                       (SHIP_HIT_PAUSED if game.ship_hit_paused else 0))
+        state.score, state.high_score = stats.score, stats.high_score
+        state.level, state.ships_left = stats.level, stats.ships_left
+        state.ship_x = int(quantize(game.ship.x))
+        state.fleet = fleet.fleets_created & 0xFFFF
+        state.offset_x = int(np.rint(fleet.offset_x * QUANT))
+        state.offset_y = int(np.rint(fleet.offset_y * QUANT))
+
+        state.alien_alive[:] = fleet.alive
+        # Relative to the offset, aliens stay put until a new fleet is made.
+        state.alien_x[:] = quantize(fleet.x - fleet.offset_x)
+        state.alien_y[:] = quantize(fleet.y - fleet.offset_y)
+
+        for bullet in game.bullet_manager.bullets:
+            slot = self.bullet_slots[bullet]
+            state.bullet_active[slot] = 1
+            state.bullet_x[slot] = quantize(bullet.rect.x)
+            state.bullet_y[slot] = quantize(bullet.y)
+        return state
+
+    def encode(self, state, previous=None):
+        """
+        Return a SNAPSHOT message for state.
+
+        Args:
+        previous (StateFrame): The frame the client already has; None, or
+            one with a different fleet size, sends a keyframe.
+        """
+        keyframe = previous is None or len(previous.alien_alive) != len(state.alien_alive)
+        if keyframe:
+            aliens = np.arange(len(state.alien_alive))
+            bullets = np.arange(len(state.bullet_active))
+        else:
+            aliens = np.flatnonzero((state.alien_alive != previous.alien_alive) |
+                                    (state.alien_x != previous.alien_x) |
+                                    (state.alien_y != previous.alien_y))
+            bullets = np.flatnonzero((state.bullet_active != previous.bullet_active) |
+                                     (state.bullet_x != previous.bullet_x) |
+                                     (state.bullet_y != previous.bullet_y))
+
+        alien_changes = np.empty(len(aliens), dtype=ALIEN_CHANGE)
+        alien_changes["index"] = aliens
+        alien_changes["alive"] = state.alien_alive[aliens]
+        alien_changes["x"] = state.alien_x[aliens]
+        alien_changes["y"] = state.alien_y[aliens]
+        bullet_changes = np.empty(len(bullets), dtype=BULLET_CHANGE)
+        bullet_changes["slot"] = bullets
+        bullet_changes["active"] = state.bullet_active[bullets]
+        bullet_changes["x"] = state.bullet_x[bullets]
+        bullet_changes["y"] = state.bullet_y[bullets]
+
+        header = SNAPSHOT_HEADER.pack(
+            state.tick, state.flags | (KEYFRAME if keyframe else 0),
+            state.score, state.high_score, state.level, state.ships_left,
+            state.ship_x, state.fleet, state.offset_x, state.offset_y,
+            len(state.alien_alive), len(aliens), len(bullets))
+        return frame(SNAPSHOT, header + alien_changes.tobytes() + bullet_changes.tobytes())
+
+
+def apply_snapshot(state, payload, bullet_slots):
+    """
+    Apply a SNAPSHOT payload to the client's copy of the state.
+
+    Args:
+    state (StateFrame): The client's state, or None before the first keyframe.
+    bullet_slots (int): Size of the server's bullet pool.
+
+    Returns:
+    StateFrame: The updated state; a new one for a keyframe, else state itself.
+    """
+    (tick, flags, score, high_score, level, ships_left, ship_x, fleet, offset_x, offset_y,
+     alien_count, alien_changes, bullet_changes) = SNAPSHOT_HEADER.unpack_from(payload)
+    if flags & KEYFRAME:
+        state = StateFrame(alien_count, bullet_slots)
+    elif state is None:
+        raise ValueError("Snapshot delta arrived before any keyframe")
+    state.tick, state.flags = tick, flags & ~KEYFRAME
+    state.score, state.high_score = score, high_score
+    state.level, state.ships_left = level, ships_left
+    state.ship_x, state.fleet = ship_x, fleet
+    state.offset_x, state.offset_y = offset_x, offset_y
+
+    offset = SNAPSHOT_HEADER.size
+    aliens = np.frombuffer(payload, ALIEN_CHANGE, alien_changes, offset)
+    offset += aliens.nbytes
+    bullets = np.frombuffer(payload, BULLET_CHANGE, bullet_changes, offset)
+    state.alien_alive[aliens["index"]] = aliens["alive"]
+    state.alien_x[aliens["index"]] = aliens["x"]
+    state.alien_y[aliens["index"]] = aliens["y"]
+    state.bullet_active[bullets["slot"]] = bullets["active"]
+    state.bullet_x[bullets["slot"]] = bullets["x"]
+    state.bullet_y[bullets["slot"]] = bullets["y"]
+    return state
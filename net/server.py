@@ -0,0 +1,215 @@
+import asyncio
+import json
+from time import perf_counter
+
+import pygame
+
+from core.replay import InputLog, PRESENTATION_KEYS
+from core.scheduler import FixedTimestep
+from net import protocol
+
+
+class ClientConnection:
+    """A class to hold one connected client and what has been sent to it."""
+
+    def __init__(self, client_id, reader, writer):
+        """Initialise the connection; the client is a spectator until it says otherwise."""
+        self.client_id = client_id
+        self.reader = reader
+        self.writer = writer
+        self.role = protocol.SPECTATOR
+        # The last frame this client was sent, or None if it needs a keyframe.
+        self.baseline = None
+        self.bytes_sent = 0
+        self.snapshots_sent = 0
+        self.keyframes_sent = 0
+        self.snapshots_skipped = 0
+
+    def send(self, message):
+        """Queue a message on the socket without waiting for it to be written."""
+        self.writer.write(message)
+        self.bytes_sent += len(message)
+
+
+class GameServer:
+    """
+    A class to run a game as the authority for networked clients.
+
+    The server simulates at the tick rate and, after every tick, sends each
+    client a snapshot of what changed since the last one it was sent. The
+    delta is encoded once per tick and shared by every client that is up
+    to date. Sends never wait: a client whose socket has more than
+    max_buffer bytes queued is skipped, and gets a keyframe once it has
+    caught up, so slow spectators cannot hold back the simulation.
+    Inputs from player clients are handled before the next tick, as if
+    they were local; spectators' inputs are ignored.
+    """
+
+    def __init__(self, game, max_buffer=64 * 1024):
+        """Initialise the server for a game; call start() to listen."""
+        self.game = game
+        self.max_buffer = max_buffer
+        self.encoder = protocol.SnapshotEncoder(game)
+        self.config = json.dumps(game.settings.config).encode()
+        self.clients = {}
+        self.next_client_id = 0
+        self.inputs = []
+        self.server = None
+        self.running = False
+        # Counters.
+        self.ticks = 0
+        self.encode_seconds = 0.0
+        self.started_at = None
+
+    async def start(self, host="127.0.0.1", port=0):
+        """
+        Start listening for clients.
+
+        Returns:
+        int: The port listened on, useful when port 0 picks a free one.
+        """
+        self.server = await asyncio.start_server(self._handle_client, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def run(self, seconds=None):
+        """Simulate and stream the game until stop() is called, or for the given seconds."""
+        settings = self.game.settings
+        timestep = FixedTimestep(settings.tick_rate, settings.max_ticks_per_frame)
+        loop = asyncio.get_running_loop()
+        self.running = True
+        self.started_at = last = loop.time()
+        previous = self.encoder.capture()
+        while self.running:
+            now = loop.time()
+            for _ in range(timestep.advance(now - last)):
+                self._handle_inputs()
+                if self.game.game_active:
+                    self.game.update_game()
+                previous = self._broadcast(previous)
+            last = now
+            if seconds is not None and now - self.started_at >= seconds:
+                break
+            # Sleep until the next tick is due.
+            await asyncio.sleep(max(0.0, (1 - timestep.alpha) / settings.tick_rate))
+
+    def stop(self):
+        """Stop the simulation loop and close every connection."""
+        self.running = False
+        for client in list(self.clients.values()):
+            client.writer.close()
+        if self.server:
+            self.server.close()
+
+    def _handle_inputs(self):
+        """Hand the inputs received since the last tick to the game."""
+        inputs, self.inputs = self.inputs, []
+        for event in inputs:
+            self.game._handle_event(event)
+
+    def _broadcast(self, previous):
+        """Send every client the latest tick, and return it as the new baseline."""
+        start = perf_counter()
+        state = self.encoder.capture()
+        delta = keyframe = None
+        for client in list(self.clients.values()):
+            if client.writer.transport.get_write_buffer_size() > self.max_buffer:
+                # The client is falling behind; start it again from a keyframe later.
+                client.baseline = None
+                client.snapshots_skipped += 1
+                continue
+            if client.baseline is previous:
+                if delta is None:
+                    delta = self.encoder.encode(state, previous)
+                message = delta
+            else:
+                if keyframe is None:
+                    keyframe = self.encoder.encode(state)
+                message = keyframe
+                client.keyframes_sent += 1
+            client.send(message)
+            client.snapshots_sent += 1
+            client.baseline = state
+        self.ticks += 1
+        self.encode_seconds += perf_counter() - start
+        return state
+
+    async def _handle_client(self, reader, writer):
+        """Serve one client until it disconnects."""
+        client = ClientConnection(self.next_client_id, reader, writer)
+        self.next_client_id += 1
+        client.send(protocol.frame(protocol.WELCOME, protocol.WELCOME_BODY.pack(
+            client.client_id, self.game.settings.tick_rate) + self.config))
+        self.clients[client.client_id] = client
+        try:
+            while True:
+                message_type, payload = await protocol.read_frame(reader)
+                self._handle_message(client, message_type, payload)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            del self.clients[client.client_id]
+            writer.close()
+
+    def _handle_message(self, client, message_type, payload):
+        """Respond to one message from a client."""
+        if message_type == protocol.HELLO:
+            (client.role,) = protocol.HELLO_BODY.unpack(payload)
+        elif message_type == protocol.PING:
+            # Echo straight back, so the client can time the round trip.
+            client.send(protocol.frame(protocol.PONG, payload))
+        elif message_type == protocol.INPUT and client.role == protocol.PLAYER:
+            event = self._input_event(*protocol.INPUT_BODY.unpack(payload))
+            if event is not None:
+                self.inputs.append(event)
+
+    def _input_event(self, kind, code, x, y):
+        """Rebuild a pygame event from an INPUT message, or None if the server should ignore it."""
+        event_type = InputLog.EVENT_TYPES.get(kind)
+        if event_type is None:
+            return None
+        if kind == InputLog.MOUSEBUTTONDOWN:
+            return pygame.event.Event(event_type, button=code, pos=(x, y))
+        # Quitting and the like only concern the client.
+        if code in PRESENTATION_KEYS:
+            return None
+        return pygame.event.Event(event_type, key=code)
+
+    def stats(self):
+        """
+        Return the server's counters.
+
+        Returns:
+        dict: Ticks simulated and their rate, mean encode time per tick,
+            and per client the bytes, snapshots and keyframes sent and
+            snapshots skipped.
+        """
+        elapsed = asyncio.get_running_loop().time() - self.started_at if self.started_at else 0.0
+        return {
+            "ticks": self.ticks,
+            "ticks_per_second": self.ticks / elapsed if elapsed else 0.0,
+            "encode_ms": self.encode_seconds / self.ticks * 1000 if self.ticks else 0.0,
+            "clients": {
+                client.client_id: {
+                    "role": "player" if client.role == protocol.PLAYER else "spectator",
+                    "bytes_sent": client.bytes_sent,
+                    "bytes_per_second": client.bytes_sent / elapsed if elapsed else 0.0,
+                    "snapshots_sent": client.snapshots_sent,
+                    "keyframes_sent": client.keyframes_sent,
+                    "snapshots_skipped": client.snapshots_skipped,
+                }
+                for client in self.clients.values()
+            },
+        }
+
+
+async def serve(host, port):
+    """Run a headless game as a server until interrupted."""
+    from core.game_logic import GameLogic
+
+    server = GameServer(GameLogic(headless=True))
+    port = await server.start(host, port)
+    print(f"Serving Alien Invasion on {host}:{port}")
+    try:
+        await server.run()
+    finally:
+        server.stop()
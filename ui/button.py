@@ -1,5 +1,7 @@
 import pygame.font
 
+from ui.text_cache import get_font
+
 class Button:
     """A class to build buttons for the game."""
 
@@ -7,12 +9,13 @@ class Button:
         """Initialise button attributes."""
         self.screen = ai_game.screen
         self.screen_rect = self.screen.get_rect()
+        self.text_cache = ai_game.text_cache
         
         # Set the dimensions and properties of the button.
         self.width, self.height = 200, 50
         self.button_color = (0, 135, 0)
         self.text_color = (255, 255, 255)
-        self.font = pygame.font.SysFont(None, 48)
+        self.font = get_font(48)
 
         # Build the buttons rect opbject and centre it. 
         self.rect = pygame.Rect(0,0, self.width, self.height)
@@ -23,8 +26,8 @@ class Button:
 
     def _prep_msg(self, msg):
         """Turn msg into a rendered image and centre text on the button."""
-        self.msg_image = self.font.render(msg, True, self.text_color
-                                          , self.button_color)
+        self.msg_image = self.text_cache.render(self.font, msg, self.text_color,
+                                                self.button_color)
         self.msg_image_rect = self.msg_image.get_rect()
         self.msg_image_rect.center = self.rect.center
 
@@ -0,0 +1,112 @@
+import pygame
+
+
+class DirtyRenderer:
+    """
+    A class to redraw and present only the parts of the screen that changed.
+
+    Each frame the game is described as layers (ship, aliens, bullets,
+    scoreboard, button and profiler overlay). A layer whose signature differs from the last
+    frame marks both its old and new rects as dirty; only those areas are
+    cleared, redrawn and passed to pygame.display.update(). When nothing
+    changed, nothing is drawn or presented.
+    """
+
+    def __init__(self, ai_game):
+        """Initialise the renderer for the given game."""
+        self.ai_game = ai_game
+        # Maps a layer name to its (signature, rects) from the last frame.
+        self.previous = {}
+        # The first frame has to cover the whole screen.
+        self.full_redraw = True
+
+    def invalidate(self):
+        """Force the next frame to redraw and present the whole screen."""
+        self.full_redraw = True
+
+    def _layers(self):
+        """
+        Describe what is on screen this frame, in drawing order.
+
+        Returns:
+        list: (name, signature, rects, draw) for each layer.
+        """
+        game = self.ai_game
+        sb = game.sb
+        bullet_rects = [bullet.rect.copy() for bullet in game.bullet_manager.bullets]
+        fleet_rect = game.fleet_manager.bounding_rect()
+        score_rects = [sb.score_rect.copy(), sb.high_score_rect.copy(),
+                       sb.level_rect.copy(), sb.ships_rect.copy()]
+        button_rects = [] if game.game_active else [game.play_button.rect.copy()]
+        overlay = game.profiler_overlay
+        overlay_rects = [overlay.rect.copy()] if overlay.visible else []
+        return [
+            ("bullets", tuple(tuple(rect) for rect in bullet_rects), bullet_rects,
+             self._draw_bullets),
+            ("ship", (tuple(game.ship.rect), game.ship.image), [game.ship.rect.copy()],
+             game.ship.blitme),
+            # The fleet moves as one, so its bounding rect covers every alien.
+            ("aliens", (tuple(fleet_rect), len(game.fleet_manager)), [fleet_rect],
+             self._draw_aliens),
+            ("scoreboard", (sb.score_image, sb.high_score_image, sb.level_image, sb.ships_image),
+             score_rects, sb.show_score),
+            ("button", (game.game_active, game.play_button.msg_image), button_rects,
+             game.play_button.draw_button),
+            ("profiler", (overlay.visible, overlay.image), overlay_rects, overlay.draw),
+        ]
+
+    def _draw_bullets(self):
+        """Draw every bullet."""
+        self.ai_game.bullet_manager.draw(self.ai_game.screen)
+
+    def _draw_aliens(self):
+        """Draw the alien fleet."""
+        self.ai_game.fleet_manager.draw(self.ai_game.screen)
+
+    def render(self):
+        """
+        Redraw the changed areas of the screen and present them.
+
+        Returns:
+        list: The rects that were presented; empty if nothing changed.
+        """
+        screen = self.ai_game.screen
+        bg_color = self.ai_game.bg_color
+        layers = self._layers()
+        previous, self.previous = self.previous, {
+            name: (signature, rects) for name, signature, rects, _ in layers}
+
+        if self.full_redraw:
+            self.full_redraw = False
+            screen.fill(bg_color)
+            # Layers with no rects are hidden, like the Play button during a game.
+            for _, _, rects, draw in layers:
+                if rects:
+                    draw()
+            pygame.display.flip()
+            return [screen.get_rect()]
+
+        dirty = []
+        for name, signature, rects, _ in layers:
+            if name not in previous or previous[name][0] != signature:
+                if name in previous:
+                    dirty.extend(previous[name][1])
+                dirty.extend(rects)
+
+        screen_rect = screen.get_rect()
+        dirty = [rect.clip(screen_rect) for rect in dirty]
+        dirty = [rect for rect in dirty if rect.width and rect.height]
+        if not dirty:
+            return []
+
+        # Clear each dirty area and redraw, clipped to it, the layers it touches.
+        for area in dirty:
+            screen.set_clip(area)
+            screen.fill(bg_color, area)
+            for _, _, rects, draw in layers:
+                if area.collidelist(rects) != -1:
+                    draw()
+        screen.set_clip(None)
+
+        pygame.display.update(dirty)
+        return dirty
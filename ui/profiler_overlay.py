@@ -0,0 +1,54 @@
+import pygame
+import pygame.font
+
+from ui.text_cache import get_font
+
+
+class ProfilerOverlay:
+    """A class to show the frame profiler's per-phase timings on screen."""
+
+    def __init__(self, ai_game):
+        """Initialise the overlay attributes."""
+        self.screen = ai_game.screen
+        self.profiler = ai_game.profiler
+        self.frame_budget = ai_game.frame_budget
+        self.visible = False
+
+        self.text_color = (255, 255, 0)
+        self.bg_color = (0, 0, 0)
+        self.font = get_font(20)
+        # Re-render the timings only every so many frames.
+        self.refresh_frames = 30
+        self.last_refresh = None
+        self.prep_timings()
+
+    def prep_timings(self):
+        """Turn the per-phase p50/p99 timings into a rendered image."""
+        lines = ["phase  p50 / p99 ms"]
+        for name, (p50, p99) in self.profiler.percentiles().items():
+            lines.append(f"{name}  {p50:.3f} / {p99:.3f}")
+        lines.append(f"quality level {self.frame_budget.level}, "
+                     f"render scale {self.frame_budget.render_scale:g}")
+        images = [self.font.render(line, True, self.text_color, self.bg_color)
+                  for line in lines]
+        width = max(image.get_width() for image in images) + 10
+        line_height = self.font.get_linesize()
+
+        self.image = pygame.Surface((width, line_height * len(images) + 10))
+        self.image.fill(self.bg_color)
+        for line_number, image in enumerate(images):
+            self.image.blit(image, (5, 5 + line_number * line_height))
+        # Show the timings at the bottom left of the screen.
+        self.rect = self.image.get_rect()
+        self.rect.bottomleft = self.screen.get_rect().bottomleft
+        self.last_refresh = self.profiler.frame
+
+    def update(self):
+        """Refresh the timings if enough frames have passed."""
+        if self.visible and self.profiler.frame - self.last_refresh >= self.refresh_frames:
+            self.prep_timings()
+
+    def draw(self):
+        """Draw the timings, if the overlay is visible."""
+        if self.visible:
+            self.screen.blit(self.image, self.rect)
@@ -0,0 +1,105 @@
+import weakref
+
+import pygame
+
+
+class ScaledView:
+    """
+    A class to draw the game at a different resolution from the one it is laid out in.
+
+    Everything in the game is positioned in the screen_width by
+    screen_height space of the settings. A ScaledView stands in for the
+    screen surface: fill(), blit(), blits() and set_clip() take those
+    coordinates and draw onto a surface scale times the size, with each
+    image scaled to match once and cached. present() then stretches that
+    surface over an area of the display; when the two are the same size
+    the view draws straight onto the display instead.
+    """
+
+    def __init__(self, logical_size, scale, display, area):
+        """
+        Initialise a view of the given logical size.
+
+        Args:
+        logical_size (tuple): Width and height the game is laid out in.
+        scale (float): Internal pixels per logical pixel.
+        display (pygame.Surface): The surface to present to.
+        area (pygame.Rect): The part of display the view fills.
+        """
+        self.scale = scale
+        self.rect = pygame.Rect((0, 0), logical_size)
+        self.area = pygame.Rect(area)
+        self.target = display.subsurface(self.area)
+        size = (round(logical_size[0] * scale), round(logical_size[1] * scale))
+        # Draw straight onto the display if nothing would be stretched.
+        self.direct = size == self.area.size
+        if self.direct:
+            self.surface = self.target
+        else:
+            self.surface = pygame.Surface(size).convert(display)
+        # Scaled copies of images, dropped once the original is gone.
+        self.images = weakref.WeakKeyDictionary()
+
+    def get_rect(self):
+        """Return the logical rect of the view."""
+        return self.rect.copy()
+
+    def get_size(self):
+        """Return the logical size of the view."""
+        return self.rect.size
+
+    def to_view(self, rect):
+        """Return a logical rect in the view's own pixels."""
+        rect = pygame.Rect(rect)
+        scale = self.scale
+        left, top = round(rect.left * scale), round(rect.top * scale)
+        return pygame.Rect(left, top, round(rect.right * scale) - left,
+                           round(rect.bottom * scale) - top)
+
+    def to_logical(self, position):
+        """Return the logical position of a point on the display, such as a mouse click."""
+        x, y = position
+        scale = self.area.width / self.rect.width
+        return (round((x - self.area.x) / scale), round((y - self.area.y) / scale))
+
+    def fill(self, color, rect=None):
+        """Fill the whole view, or a logical rect of it, with a colour."""
+        if rect is None:
+            return self.surface.fill(color)
+        return self.surface.fill(color, self.to_view(rect))
+
+    def set_clip(self, rect=None):
+        """Only draw within a logical rect, or anywhere if rect is None."""
+        self.surface.set_clip(None if rect is None else self.to_view(rect))
+
+    def blit(self, image, dest):
+        """Draw an image at a logical position."""
+        return self.surface.blit(self._scaled(image), self._position(dest))
+
+    def blits(self, blit_sequence, doreturn=True):
+        """Draw each (image, logical position) pair."""
+        scaled, position = self._scaled, self._position
+        return self.surface.blits([(scaled(image), position(dest)) for image, dest in blit_sequence],
+                                  doreturn=doreturn)
+
+    def _position(self, dest):
+        """Return the view pixel a logical position or rect's top left falls on."""
+        return (round(dest[0] * self.scale), round(dest[1] * self.scale))
+
+    def _scaled(self, image):
+        """Return image scaled to the view, scaling it only the first time."""
+        scaled = self.images.get(image)
+        if scaled is None:
+            width, height = image.get_size()
+            size = (max(1, round(width * self.scale)), max(1, round(height * self.scale)))
+            if image.get_bitsize() >= 24:
+                scaled = pygame.transform.smoothscale(image, size)
+            else:
+                scaled = pygame.transform.scale(image, size)
+            self.images[image] = scaled
+        return scaled
+
+    def present(self):
+        """Stretch what was drawn over the view's area of the display."""
+        if not self.direct:
+            pygame.transform.scale(self.surface, self.area.size, self.target)
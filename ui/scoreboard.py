@@ -1,6 +1,7 @@
+import pygame
 import pygame.font
-from pygame.sprite import Group
-from entities.ship import Ship
+
+from ui.text_cache import get_font
 
 class Scoreboard:
     """A class to report scoring information."""
@@ -11,12 +12,17 @@ class Scoreboard:
         self.screen_rect = self.screen.get_rect()
         self.settings = ai_game.settings
         self.stats = ai_game.stats
+        self.text_cache = ai_game.text_cache
 
         self.ai_game = ai_game
 
+        # A single converted ship icon, and the strips of icons built from it.
+        self.ship_icon = ai_game.asset_manager.load_image('assets/images/ship.bmp')
+        self.life_strips = {}
+
         # Font settings for scoring information.
         self.text_color = (30, 30, 30)
-        self.font = pygame.font.SysFont(None, 48)
+        self.font = get_font(48)
         # Prepare the initial score image.
         self.prep_score()
         self.prep_high_score()
@@ -25,18 +31,26 @@ class Scoreboard:
 
     def prep_ships(self):
         """Show how many ships are left."""
-        self.ships = Group()
-        for ship_number in range(self.stats.ships_left):
-            ship = Ship(self.ai_game)
-            ship.rect.x = 10 + ship_number * ship.rect.width
-            ship.rect.y = 10
-            self.ships.add(ship)
+        ships_left = max(self.stats.ships_left, 0)
+        if ships_left not in self.life_strips:
+            self.life_strips[ships_left] = self._build_life_strip(ships_left)
+        self.ships_image = self.life_strips[ships_left]
+        self.ships_rect = self.ships_image.get_rect()
+        self.ships_rect.topleft = (10, 10)
+
+    def _build_life_strip(self, count):
+        """Composite count ship icons side by side into one image."""
+        icon_width, icon_height = self.ship_icon.get_size()
+        strip = pygame.Surface((icon_width * count, icon_height)).convert()
+        strip.blits([(self.ship_icon, (ship_number * icon_width, 0))
+                     for ship_number in range(count)], doreturn=False)
+        return strip
 
     def prep_level(self):
         """Turn the lvel into a rendered image."""
         level_str = f"LEVEL: {self.stats.level}"
-        self.level_image = self.font.render(level_str, True,
-                                            self.text_color, self.settings.bg_color)
+        self.level_image = self.text_cache.render(self.font, level_str,
+                                                  self.text_color, self.settings.bg_color)
         
         # Position the level below the score. 
         self.level_rect = self.level_image.get_rect()
@@ -47,8 +61,8 @@ class Scoreboard:
         """Turn the score into a rendered image."""
         rounded_score = round(self.stats.score, -1)
         score_str = f"SCORE: {rounded_score:,}"
-        self.score_image = self.font.render(score_str, True,
-                                            self.text_color, self.settings.bg_color)
+        self.score_image = self.text_cache.render(self.font, score_str,
+                                                  self.text_color, self.settings.bg_color)
         
         # Display the score at the top right of the screen.
         self.score_rect = self.score_image.get_rect()
@@ -60,15 +74,19 @@ class Scoreboard:
         self.screen.blit(self.score_image, self.score_rect)
         self.screen.blit(self.high_score_image, self.high_score_rect)
         self.screen.blit(self.level_image, self.level_rect)
-        self.ships.draw(self.screen)
+        self.screen.blit(self.ships_image, self.ships_rect)
 
+    def images(self):
+        """Return the (image, rect) pairs show_score() draws, in order."""
+        return [(self.score_image, self.score_rect), (self.high_score_image, self.high_score_rect),
+                (self.level_image, self.level_rect), (self.ships_image, self.ships_rect)]
 
     def prep_high_score(self):
         """Turn the highscore into a rendered image"""""
         high_score = round(self.stats.high_score, -1)
         high_score_str = f"HIGH SCORE: {high_score:,}"
-        self.high_score_image = self.font.render(high_score_str, True,
-                                                 self.text_color, self.settings.bg_color)
+        self.high_score_image = self.text_cache.render(self.font, high_score_str,
+                                                       self.text_color, self.settings.bg_color)
         # Center the high score at the top of the screen.
         self.high_score_rect = self.high_score_image.get_rect()
         self.high_score_rect.centerx = self.screen_rect.centerx
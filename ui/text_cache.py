@@ -0,0 +1,175 @@
+from collections import OrderedDict
+import string
+
+import pygame
+
+
+# Fonts shared by every HUD element, keyed by size.
+_fonts = {}
+
+
+def get_font(size):
+    """
+    Return the default font at the given size, loading it only once.
+
+    This is the font pygame.font.SysFont(None, size) gives, without
+    scanning the system's installed fonts first.
+    """
+    if not pygame.font.get_init():
+        # Fonts do not outlive the font module, so start again after pygame.quit().
+        pygame.font.init()
+        _fonts.clear()
+    font = _fonts.get(size)
+    if font is None:
+        font = pygame.font.Font(None, size)
+        _fonts[size] = font
+    return font
+
+
+class GlyphAtlas:
+    """
+    A class holding the glyphs of numbers in one font and colour pair in a single surface.
+
+    Glyphs laid side by side lose the font's kerning and the sub-pixel
+    advances of whole-string rendering, so only numbers, whose glyphs are
+    near enough uniform, are built from the atlas; a string of them can
+    come out a few pixels narrower or wider than the font would draw it.
+    """
+
+    # Characters pre-rendered into each atlas.
+    CHARSET = string.digits + ","
+
+    def __init__(self, font, text_color, bg_color=None):
+        """Render each glyph once and pack them side by side into the atlas."""
+        self.text_color = text_color
+        self.bg_color = bg_color
+        self.font = font
+        self.height = font.get_height()
+        # Text rendered whole to go in front of numbers, like "SCORE: ".
+        self.labels = {}
+
+        glyphs = [(char, self._render_glyph(font, char)) for char in self.CHARSET]
+        width = sum(glyph.get_width() for _, glyph in glyphs)
+        self.surface = self._new_surface(width)
+        if self.bg_color is not None:
+            self.surface.fill(self.bg_color)
+
+        # Map each character to its area of the atlas.
+        self.areas = {}
+        x = 0
+        for char, glyph in glyphs:
+            self.surface.blit(glyph, (x, 0))
+            self.areas[char] = pygame.Rect(x, 0, glyph.get_width(), self.height)
+            x += glyph.get_width()
+
+    def _render_glyph(self, font, char):
+        """Render a single character with the atlas colours."""
+        if self.bg_color is None:
+            return font.render(char, True, self.text_color)
+        return font.render(char, True, self.text_color, self.bg_color)
+
+    def _new_surface(self, width, height=None):
+        """Create a surface of the atlas height, or the given one, transparent if there is no background."""
+        size = (max(width, 1), height or self.height)
+        if self.bg_color is None:
+            return pygame.Surface(size, pygame.SRCALPHA)
+        return pygame.Surface(size)
+
+    def render(self, text, label=""):
+        """
+        Build an image of text by blitting cached glyphs; they cover every pixel.
+
+        Args:
+        label (str): Text to put in front of the glyphs, rendered whole.
+        """
+        areas = [self.areas[char] for char in text]
+        blits = []
+        x = 0
+        height = self.height
+        if label:
+            label_image = self._get_label(label)
+            blits.append((label_image, (0, 0)))
+            x = label_image.get_width()
+            height = max(height, label_image.get_height())
+        surface = self._new_surface(x + sum(area.width for area in areas), height)
+        if height > self.height and self.bg_color is not None:
+            # The glyphs do not reach the bottom of a taller label.
+            surface.fill(self.bg_color)
+        for area in areas:
+            blits.append((self.surface, (x, 0), area))
+            x += area.width
+        surface.blits(blits, doreturn=False)
+        return surface
+
+    def _get_label(self, label):
+        """Return the image of a label, rendered the first time and kept in the atlas's format."""
+        image = self.labels.get(label)
+        if image is None:
+            # Font images with a background have a palette, which is slow to blit from.
+            image = self._render_glyph(self.font, label).convert(self.surface)
+            self.labels[label] = image
+        return image
+
+
+class TextCache:
+    """
+    A class to share rendered text between the HUD elements.
+
+    Numbers at the end of a string, like a score, are built from glyph
+    atlases (one per font and colour pair) so the font is rasterised only
+    once per digit; the text before them is rendered whole, so it keeps
+    its kerning, and kept by the atlas. Other text is rendered whole. Whole
+    strings are kept
+    in a least-recently-used cache. An atlas is only built once a font and
+    colour pair is asked for a second string, so text drawn just once (like
+    a button label) never pays for one.
+    """
+
+    def __init__(self, max_strings=256):
+        """Initialise empty atlas and string caches."""
+        self.max_strings = max_strings
+        self.atlases = {}
+        # Font and colour pairs that have rendered a string without an atlas.
+        self.seen = set()
+        self.strings = OrderedDict()
+
+    def render(self, font, text, text_color, bg_color=None):
+        """
+        Return an image of text, rendering it only if it is not cached.
+
+        Returns:
+        pygame.Surface: The rendered text; callers must not draw onto it.
+        """
+        text_color = tuple(text_color)
+        bg_color = tuple(bg_color) if bg_color is not None else None
+        key = (font, text, text_color, bg_color)
+        image = self.strings.get(key)
+        if image is not None:
+            self.strings.move_to_end(key)
+            return image
+
+        atlas = self._get_atlas(font, text_color, bg_color)
+        label = text.rstrip(GlyphAtlas.CHARSET)
+        if atlas is not None and len(label) < len(text):
+            image = atlas.render(text[len(label):], label)
+        elif bg_color is None:
+            image = font.render(text, True, text_color)
+        else:
+            image = font.render(text, True, text_color, bg_color)
+
+        self.strings[key] = image
+        if len(self.strings) > self.max_strings:
+            self.strings.popitem(last=False)
+        return image
+
+    def _get_atlas(self, font, text_color, bg_color):
+        """Return the glyph atlas for a font and colours, or None the first time they are used."""
+        key = (font, text_color, bg_color)
+        atlas = self.atlases.get(key)
+        if atlas is None:
+            if key not in self.seen:
+                self.seen.add(key)
+                return None
+            atlas = GlyphAtlas(font, text_color, bg_color)
+            self.atlases[key] = atlas
+        return atlas